@@ -1,28 +1,35 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Depends, Request
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.concurrency import run_in_threadpool
 import uvicorn
+from contextlib import asynccontextmanager
 import logging
 import os
+import hashlib
+import operator
 import tempfile
-import shutil
+from collections import OrderedDict, defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
-import json
+from urllib.parse import quote
+from typing import Dict, List, Optional, Tuple
 from datetime import datetime
 
+import aiofiles
+import orjson
+
 from .models.audio_models import (
     AudioFileModel, 
     AudioChunk, 
-    TranscriptionResult, 
     ValidationEdit,
     UploadResponse,
     ProcessingProgress,
     ProjectSummary,
-    ChunkWithTranscription,
-    ErrorResponse
+    ErrorResponse,
+    AudioChunkRecord,
+    TranscriptionRecord
 )
 from .services.audio_processor import AudioProcessor
 from .services.transcription_service import ElevenLabsTranscriptionService
@@ -31,13 +38,35 @@ from .services.transcription_service import ElevenLabsTranscriptionService
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Transcriptions are cached by audio content and persisted across restarts
+TRANSCRIPTION_CACHE_FILE = Path("./audio_files/transcription_cache.json")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the shared services once per process, on the running event loop.
+    
+    The transcription service owns a pooled HTTP session, so it is opened
+    here and closed on shutdown together with persisting its cache.
+    """
+    app.state.audio_processor = AudioProcessor()
+    async with ElevenLabsTranscriptionService() as service:
+        app.state.transcription_service = service
+        service.load_cache(TRANSCRIPTION_CACHE_FILE)
+        yield
+        service.save_cache(TRANSCRIPTION_CACHE_FILE)
+
+
 # Initialize FastAPI app
 app = FastAPI(
     title="AI Audio Transcription & Editing App",
     description="Educational project demonstrating AI integration, modular design, and virtual environments",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 # Add CORS middleware for frontend integration
@@ -49,39 +78,77 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Initialize services (demonstrates dependency injection)
-audio_processor = AudioProcessor()
-transcription_service = ElevenLabsTranscriptionService()
+
+# Service dependencies (demonstrates dependency injection); the instances are
+# created by the lifespan handler above and shared by every request
+def get_audio_processor(request: Request) -> AudioProcessor:
+    return request.app.state.audio_processor
+
+
+def get_transcription_service(request: Request) -> ElevenLabsTranscriptionService:
+    return request.app.state.transcription_service
+
 
 # In-memory storage for demo (in production, use a database)
 # This demonstrates the need for proper data persistence
 file_storage: Dict[str, AudioFileModel] = {}
-chunks_storage: Dict[str, List[AudioChunk]] = {}
-transcriptions_storage: Dict[str, TranscriptionResult] = {}
+# Chunks and transcriptions are kept as slotted records (see audio_models)
+chunks_storage: Dict[str, List[AudioChunkRecord]] = {}
+transcriptions_storage: Dict[str, TranscriptionRecord] = {}
 validations_storage: Dict[str, ValidationEdit] = {}
 
+# Reverse index so chunk endpoints resolve a chunk id with a single lookup
+# instead of scanning every file's chunk list
+chunk_index: Dict[str, AudioChunkRecord] = {}
+
+# Per-file progress counters, updated whenever a transcription or a first
+# validation is stored, so progress reads never iterate over chunks
+completed_per_file: Dict[str, int] = defaultdict(int)
+validated_per_file: Dict[str, int] = defaultdict(int)
+
+# Serialized project summaries keyed by file id, stored together with the
+# (completed transcriptions, validated chunks) counts they were built from
+_summary_cache: Dict[str, Tuple[Tuple[int, int], bytes]] = {}
+
+# Formatted export lines keyed by (file id, include_timestamps, counts),
+# kept in LRU order and capped at EXPORT_CACHE_SIZE entries
+EXPORT_CACHE_SIZE = 128
+_export_cache: "OrderedDict[Tuple[str, bool, Tuple[int, int]], Tuple[str, ...]]" = OrderedDict()
+
+# Upload limits (50MB, read from the client in 1MB pieces)
+MAX_UPLOAD_SIZE = 50 * 1024 * 1024
+UPLOAD_READ_SIZE = 1024 * 1024
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/static")
 
+# The web interface never changes while the server runs, so read it once
+with open("app/static/index.html", "rb") as f:
+    _INDEX_HTML = f.read()
+_INDEX_ETAG = f'"{hashlib.sha256(_INDEX_HTML).hexdigest()[:16]}"'
+
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root():
+async def read_root(request: Request):
     """
     Serve the main web interface.
     
     Educational note: This demonstrates how to serve HTML interfaces
     alongside API endpoints in FastAPI.
     """
-    with open("app/static/index.html", "r") as f:
-        content = f.read()
-    return HTMLResponse(content=content)
+    headers = {"ETag": _INDEX_ETAG}
+    if request.headers.get("if-none-match") == _INDEX_ETAG:
+        return Response(status_code=304, headers=headers)
+    return HTMLResponse(content=_INDEX_HTML, headers=headers)
 
 
 @app.post("/api/upload", response_model=UploadResponse)
 async def upload_audio_file(
     background_tasks: BackgroundTasks,
-    file: UploadFile = File(...)
+    file: UploadFile = File(...),
+    audio_processor: AudioProcessor = Depends(get_audio_processor),
+    transcription_service: ElevenLabsTranscriptionService = Depends(get_transcription_service)
 ):
     """
     Upload and process an audio file.
@@ -97,39 +164,52 @@ async def upload_audio_file(
         if not file.content_type or not file.content_type.startswith('audio/'):
             raise HTTPException(status_code=400, detail="File must be an audio file")
         
-        # Check file size (50MB limit)
-        max_size = 50 * 1024 * 1024  # 50MB in bytes
-        if hasattr(file, 'size') and file.size > max_size:
-            raise HTTPException(status_code=400, detail="File too large. Maximum size is 50MB")
-        
-        # Save uploaded file temporarily
-        with tempfile.NamedTemporaryFile(delete=False, suffix=f"_{file.filename}") as temp_file:
-            shutil.copyfileobj(file.file, temp_file)
-            temp_path = temp_file.name
+        # Save uploaded file temporarily, streaming it in fixed-size reads so the
+        # event loop is never blocked and the size limit is enforced on the
+        # bytes actually received rather than on a client-supplied header
+        fd, temp_path = tempfile.mkstemp(suffix=f"_{file.filename}")
+        os.close(fd)
         
         try:
+            received = 0
+            async with aiofiles.open(temp_path, "wb") as temp_file:
+                while chunk := await file.read(UPLOAD_READ_SIZE):
+                    received += len(chunk)
+                    if received > MAX_UPLOAD_SIZE:
+                        raise HTTPException(status_code=413, detail="File too large. Maximum size is 50MB")
+                    await temp_file.write(chunk)
+            
             # Process audio file
             audio_info, chunks = await audio_processor.process_audio_file(temp_path, file.filename)
-            
-            # Store in memory (in production, use a database)
-            file_storage[audio_info.id] = audio_info
-            chunks_storage[audio_info.id] = chunks
-            
-            # Start background transcription
-            background_tasks.add_task(transcribe_file_chunks, audio_info.id, chunks)
-            
-            logger.info(f"Successfully uploaded and processed {file.filename}")
-            
-            return UploadResponse(
-                file_id=audio_info.id,
-                message=f"File uploaded successfully. Processing {len(chunks)} chunks.",
-                file_info=audio_info
-            )
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.unlink(temp_path)
+        except BaseException:
+            # Error responses don't run background tasks, so clean up now
+            # (in a worker thread, keeping the event loop free)
+            await run_in_threadpool(_safe_unlink, temp_path)
+            raise
+        
+        # The processed copy now lives in the output directory; remove the
+        # upload after the response is sent, before transcription starts
+        background_tasks.add_task(_safe_unlink, temp_path)
+        
+        # Keep chunks in playback order once so readers never need to sort
+        chunks.sort(key=operator.attrgetter("chunk_index"))
+        
+        # Store in memory (in production, use a database)
+        file_storage[audio_info.id] = audio_info
+        records = [AudioChunkRecord.from_model(chunk) for chunk in chunks]
+        chunks_storage[audio_info.id] = records
+        chunk_index.update((record.id, record) for record in records)
+        
+        # Start background transcription
+        background_tasks.add_task(transcribe_file_chunks, transcription_service, audio_info.id, chunks)
+        
+        logger.info(f"Successfully uploaded and processed {file.filename}")
+        
+        return UploadResponse(
+            file_id=audio_info.id,
+            message=f"File uploaded successfully. Processing {len(chunks)} chunks.",
+            file_info=audio_info
+        )
                 
     except HTTPException:
         raise
@@ -138,7 +218,16 @@ async def upload_audio_file(
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
 
-async def transcribe_file_chunks(file_id: str, chunks: List[AudioChunk]):
+def _safe_unlink(path: str):
+    """Delete a temporary file, ignoring files that are already gone."""
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+async def transcribe_file_chunks(transcription_service: ElevenLabsTranscriptionService,
+                                 file_id: str, chunks: List[AudioChunk]):
     """
     Background task to transcribe all chunks for a file.
     
@@ -154,13 +243,21 @@ async def transcribe_file_chunks(file_id: str, chunks: List[AudioChunk]):
         # Transcribe all chunks
         results = await transcription_service.transcribe_multiple_chunks(
             chunks, 
-            audio_files_dir,
-            max_concurrent=3
+            audio_files_dir
         )
         
-        # Store transcription results
+        # The file may have been deleted while transcription was running
+        if file_id not in file_storage:
+            logger.info(f"File {file_id} was deleted during transcription; discarding results")
+            return
+        
+        # Store transcription results. No lock is needed: there is no await
+        # until all results and their counter are stored, so this is atomic
+        # on the event loop and readers never see one without the other
         for result in results:
-            transcriptions_storage[result.chunk_id] = result
+            transcriptions_storage[result.chunk_id] = TranscriptionRecord.from_model(result)
+            completed_per_file[file_id] += 1
+        _invalidate_cached_views(file_id)
         
         logger.info(f"Completed background transcription for file {file_id}")
         
@@ -178,14 +275,9 @@ async def get_processing_status(file_id: str):
     if file_id not in file_storage:
         raise HTTPException(status_code=404, detail="File not found")
     
-    file_info = file_storage[file_id]
     chunks = chunks_storage.get(file_id, [])
     
-    # Count completed transcriptions
-    completed_transcriptions = sum(
-        1 for chunk in chunks 
-        if chunk.id in transcriptions_storage
-    )
+    completed_transcriptions = completed_per_file.get(file_id, 0)
     
     progress_percentage = (completed_transcriptions / len(chunks)) * 100 if chunks else 0
     
@@ -212,65 +304,66 @@ async def get_project_summary(file_id: str):
     Get complete project summary with all chunks and transcriptions.
     
     This endpoint provides the main data for the web interface.
+    The serialized response is cached until the number of transcribed
+    or validated chunks changes, so repeated polling is cheap.
     """
-    if file_id not in file_storage:
+    file_info = file_storage.get(file_id)
+    if file_info is None:
         raise HTTPException(status_code=404, detail="File not found")
     
-    file_info = file_storage[file_id]
     chunks = chunks_storage.get(file_id, [])
     
-    # Build chunks with transcriptions
+    version = (completed_per_file.get(file_id, 0), validated_per_file.get(file_id, 0))
+    cached = _summary_cache.get(file_id)
+    if cached and cached[0] == version:
+        return Response(content=cached[1], media_type="application/json")
+    
+    # Build the ProjectSummary / ChunkWithTranscription shape as plain dicts:
+    # every value was validated when stored, so re-validating it through the
+    # response models on each rebuild is wasted work
     chunks_with_transcriptions = []
-    completed_transcriptions = 0
-    validated_chunks = 0
     
     for chunk in chunks:
         transcription = transcriptions_storage.get(chunk.id)
         validation = validations_storage.get(chunk.id)
         
-        if transcription:
-            completed_transcriptions += 1
-        if validation:
-            validated_chunks += 1
-        
-        # Create audio URL for chunk
-        audio_url = f"/api/chunks/{chunk.id}/audio"
-        
-        chunk_data = ChunkWithTranscription(
-            chunk=chunk,
-            transcription=transcription,
-            validation=validation,
-            audio_url=audio_url
-        )
-        chunks_with_transcriptions.append(chunk_data)
-    
-    return ProjectSummary(
-        file_info=file_info,
-        total_chunks=len(chunks),
-        completed_transcriptions=completed_transcriptions,
-        validated_chunks=validated_chunks,
-        total_duration=file_info.duration_seconds,
-        chunks=chunks_with_transcriptions
-    )
+        chunks_with_transcriptions.append({
+            "chunk": chunk.to_dict(),
+            "transcription": transcription.to_dict() if transcription else None,
+            "validation": validation.model_dump() if validation else None,
+            "audio_url": f"/api/chunks/{chunk.id}/audio"
+        })
+    
+    summary = {
+        "file_info": file_info.model_dump(),
+        "total_chunks": len(chunks),
+        "completed_transcriptions": version[0],
+        "validated_chunks": version[1],
+        "total_duration": file_info.duration_seconds,
+        "estimated_accuracy": None,
+        "chunks": chunks_with_transcriptions
+    }
+    
+    content = orjson.dumps(summary)
+    _summary_cache[file_id] = (version, content)
+    return Response(content=content, media_type="application/json")
 
 
 @app.get("/api/chunks/{chunk_id}/audio")
-async def get_chunk_audio(chunk_id: str):
+async def get_chunk_audio(
+    chunk_id: str,
+    request: Request,
+    audio_processor: AudioProcessor = Depends(get_audio_processor)
+):
     """
     Serve audio chunk file.
     
+    Chunk files are immutable, so responses are cacheable forever and
+    revalidated by ETag. Single byte ranges are honored for seeking.
+    
     Educational note: This shows how to serve binary files through FastAPI.
     """
-    # Find the chunk
-    chunk = None
-    for chunks_list in chunks_storage.values():
-        for c in chunks_list:
-            if c.id == chunk_id:
-                chunk = c
-                break
-        if chunk:
-            break
-    
+    chunk = chunk_index.get(chunk_id)
     if not chunk:
         raise HTTPException(status_code=404, detail="Chunk not found")
     
@@ -280,10 +373,77 @@ async def get_chunk_audio(chunk_id: str):
     if not chunk_path.exists():
         raise HTTPException(status_code=404, detail="Audio file not found")
     
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Cache-Control": "public, max-age=31536000, immutable"
+    }
+    if chunk.etag:
+        headers["ETag"] = f'"{chunk.etag}"'
+        if request.headers.get("if-none-match") == headers["ETag"]:
+            return Response(status_code=304, headers=headers)
+    
+    range_header = request.headers.get("range")
+    if range_header:
+        return _ranged_file_response(chunk_path, range_header, "audio/wav", headers)
+    
     return FileResponse(
         path=chunk_path,
         media_type="audio/wav",
-        filename=chunk.chunk_filename
+        filename=chunk.chunk_filename,
+        headers=headers
+    )
+
+
+def _ranged_file_response(path: Path, range_header: str, media_type: str,
+                          headers: Dict[str, str]) -> Response:
+    """
+    Serve a single "bytes=start-end" range of a file as a 206 response.
+    
+    Multi-range requests are answered with the whole file, which HTTP allows.
+    """
+    file_size = path.stat().st_size
+    try:
+        unit, _, byte_range = range_header.partition("=")
+        if unit.strip() != "bytes" or "," in byte_range:
+            return FileResponse(path=path, media_type=media_type, headers=headers)
+        start_text, _, end_text = byte_range.strip().partition("-")
+        if start_text:
+            start = int(start_text)
+            end = min(int(end_text), file_size - 1) if end_text else file_size - 1
+        else:
+            # Suffix range: the last N bytes
+            start = max(file_size - int(end_text), 0)
+            end = file_size - 1
+    except ValueError:
+        # Malformed Range headers are ignored, as HTTP requires
+        return FileResponse(path=path, media_type=media_type, headers=headers)
+    
+    if start > end or start >= file_size:
+        return Response(
+            status_code=416,
+            headers={**headers, "Content-Range": f"bytes */{file_size}"}
+        )
+    
+    async def read_range(chunk_size: int = 64 * 1024):
+        async with aiofiles.open(path, "rb") as f:
+            await f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                data = await f.read(min(chunk_size, remaining))
+                if not data:
+                    break
+                remaining -= len(data)
+                yield data
+    
+    return StreamingResponse(
+        read_range(),
+        status_code=206,
+        media_type=media_type,
+        headers={
+            **headers,
+            "Content-Range": f"bytes {start}-{end}/{file_size}",
+            "Content-Length": str(end - start + 1)
+        }
     )
 
 
@@ -296,20 +456,18 @@ async def validate_transcription(chunk_id: str, validation: ValidationEdit):
     the application useful for real-world scenarios.
     """
     # Verify chunk exists
-    chunk_exists = False
-    for chunks_list in chunks_storage.values():
-        if any(c.id == chunk_id for c in chunks_list):
-            chunk_exists = True
-            break
-    
-    if not chunk_exists:
+    if chunk_id not in chunk_index:
         raise HTTPException(status_code=404, detail="Chunk not found")
     
     # Ensure validation is for correct chunk
     validation.chunk_id = chunk_id
     
-    # Store validation
+    # Store validation (only the first validation of a chunk counts)
+    file_id = chunk_index[chunk_id].file_id
+    if chunk_id not in validations_storage:
+        validated_per_file[file_id] += 1
     validations_storage[chunk_id] = validation
+    _invalidate_cached_views(file_id)
     
     logger.info(f"Validation saved for chunk {chunk_id}")
     
@@ -328,16 +486,66 @@ async def export_transcription(
     Educational note: This shows how to provide multiple output formats
     to meet different user needs.
     """
-    if file_id not in file_storage:
+    file_info = file_storage.get(file_id)
+    if file_info is None:
         raise HTTPException(status_code=404, detail="File not found")
+    if format not in ("txt", "json"):
+        raise HTTPException(status_code=400, detail="Unsupported format")
     
-    file_info = file_storage[file_id]
-    chunks = chunks_storage.get(file_id, [])
+    text_segments = _get_text_segments(file_id, include_timestamps)
     
-    # Collect all text (prefer validated over original)
-    text_segments = []
+    # Format output
+    if format == "txt":
+        filename = f"{file_info.original_filename}_transcription.txt"
+        return Response(
+            content="\n".join(text_segments).encode(),
+            media_type="text/plain",
+            headers=_attachment_headers(filename)
+        )
     
-    for chunk in sorted(chunks, key=lambda x: x.chunk_index):
+    export_data = {
+        "file_info": file_info.model_dump(),
+        "transcription": text_segments,
+        "exported_at": datetime.now().isoformat()
+    }
+    filename = f"{file_info.original_filename}_transcription.json"
+    return Response(
+        content=orjson.dumps(export_data, option=orjson.OPT_INDENT_2),
+        media_type="application/json",
+        headers=_attachment_headers(filename)
+    )
+
+
+def _get_text_segments(file_id: str, include_timestamps: bool) -> Tuple[str, ...]:
+    """
+    Return the formatted export lines for a file, reusing cached lines
+    while no transcription or validation has changed.
+    """
+    version = (completed_per_file.get(file_id, 0), validated_per_file.get(file_id, 0))
+    key = (file_id, include_timestamps, version)
+    
+    segments = _export_cache.get(key)
+    if segments is not None:
+        _export_cache.move_to_end(key)
+        return segments
+    
+    segments = tuple(_iter_text_segments(chunks_storage.get(file_id, []), include_timestamps))
+    _export_cache[key] = segments
+    if len(_export_cache) > EXPORT_CACHE_SIZE:
+        _export_cache.popitem(last=False)
+    return segments
+
+
+def _invalidate_cached_views(file_id: str):
+    """Drop the cached summary and exports of a file after its content changes."""
+    _summary_cache.pop(file_id, None)
+    for key in [key for key in _export_cache if key[0] == file_id]:
+        del _export_cache[key]
+
+
+def _iter_text_segments(chunks: List[AudioChunkRecord], include_timestamps: bool):
+    """Yield the final text for each chunk (prefer validated over original)."""
+    for chunk in chunks:
         validation = validations_storage.get(chunk.id)
         transcription = transcriptions_storage.get(chunk.id)
         
@@ -349,41 +557,23 @@ async def export_transcription(
             text = "[No transcription available]"
         
         if include_timestamps:
-            text_segments.append(f"[{chunk.start_time:.1f}s - {chunk.end_time:.1f}s] {text}")
+            yield f"[{chunk.start_time:.1f}s - {chunk.end_time:.1f}s] {text}"
         else:
-            text_segments.append(text)
-    
-    # Format output
-    if format == "txt":
-        content = "\n".join(text_segments)
-        media_type = "text/plain"
-        filename = f"{file_info.original_filename}_transcription.txt"
-    elif format == "json":
-        export_data = {
-            "file_info": file_info.dict(),
-            "transcription": text_segments,
-            "exported_at": datetime.now().isoformat()
-        }
-        content = json.dumps(export_data, indent=2)
-        media_type = "application/json"
-        filename = f"{file_info.original_filename}_transcription.json"
-    else:
-        raise HTTPException(status_code=400, detail="Unsupported format")
-    
-    # Create temporary file for download
-    with tempfile.NamedTemporaryFile(mode='w', delete=False, suffix=f".{format}") as temp_file:
-        temp_file.write(content)
-        temp_path = temp_file.name
-    
-    return FileResponse(
-        path=temp_path,
-        media_type=media_type,
-        filename=filename
-    )
+            yield text
+
+
+def _attachment_headers(filename: str) -> Dict[str, str]:
+    """Build a Content-Disposition header that is safe for non-ASCII filenames."""
+    quoted = quote(filename)
+    if quoted != filename:
+        return {"Content-Disposition": f"attachment; filename*=utf-8''{quoted}"}
+    return {"Content-Disposition": f'attachment; filename="{filename}"'}
 
 
 @app.get("/api/health")
-async def health_check():
+async def health_check(
+    transcription_service: ElevenLabsTranscriptionService = Depends(get_transcription_service)
+):
     """
     Health check endpoint for monitoring.
     
@@ -400,32 +590,41 @@ async def health_check():
         },
         "storage": {
             "files_in_memory": len(file_storage),
-            "chunks_in_memory": sum(len(chunks) for chunks in chunks_storage.values())
+            "chunks_in_memory": len(chunk_index)
         }
     }
 
 
 @app.delete("/api/files/{file_id}")
-async def delete_file(file_id: str):
+async def delete_file(
+    file_id: str,
+    audio_processor: AudioProcessor = Depends(get_audio_processor)
+):
     """
     Delete a file and clean up associated data.
     
     Educational note: Proper cleanup is important for resource management.
     """
-    if file_id not in file_storage:
+    if file_storage.pop(file_id, None) is None:
         raise HTTPException(status_code=404, detail="File not found")
     
-    # Clean up storage
-    chunks = chunks_storage.get(file_id, [])
-    
-    # Remove transcriptions and validations
-    for chunk in chunks:
-        transcriptions_storage.pop(chunk.id, None)
-        validations_storage.pop(chunk.id, None)
-    
-    # Remove chunks and file info
-    chunks_storage.pop(file_id, None)
-    file_storage.pop(file_id, None)
+    # Remove file-level entries
+    chunks = chunks_storage.pop(file_id, [])
+    has_transcriptions = completed_per_file.pop(file_id, 0) > 0
+    has_validations = validated_per_file.pop(file_id, 0) > 0
+    _invalidate_cached_views(file_id)
+    
+    # Remove chunk-level entries, skipping maps the counters show to be empty
+    # for this file
+    chunk_ids = [chunk.id for chunk in chunks]
+    for chunk_id in chunk_ids:
+        chunk_index.pop(chunk_id, None)
+    if has_transcriptions:
+        for chunk_id in chunk_ids:
+            transcriptions_storage.pop(chunk_id, None)
+    if has_validations:
+        for chunk_id in chunk_ids:
+            validations_storage.pop(chunk_id, None)
     
     # Clean up files
     audio_processor.cleanup_temp_files(file_id)
@@ -439,12 +638,12 @@ async def delete_file(file_id: str):
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom error handler for better error responses."""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content=ErrorResponse(
             error=exc.detail,
             error_code=f"HTTP_{exc.status_code}"
-        ).dict()
+        ).model_dump()
     )
 
 
@@ -452,12 +651,12 @@ async def http_exception_handler(request, exc):
 async def general_exception_handler(request, exc):
     """Handle unexpected errors gracefully."""
     logger.error(f"Unexpected error: {str(exc)}")
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=500,
         content=ErrorResponse(
             error="Internal server error",
             detail="An unexpected error occurred"
-        ).dict()
+        ).model_dump()
     )
 
 
@@ -508,11 +707,13 @@ async def explain_architecture():
 
 
 if __name__ == "__main__":
-    # Run the application
+    # Run the application. uvicorn[standard] installs uvloop and httptools,
+    # which uvicorn's default "auto" loop/http settings pick up. A single
+    # worker is required because storage lives in process memory.
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,  # For development
+        host=os.getenv("HOST", "0.0.0.0"),
+        port=int(os.getenv("PORT", "8000")),
+        reload=os.getenv("DEBUG", "False").lower() == "true",  # For development
         log_level="info"
-    ) 
\ No newline at end of file
+    )
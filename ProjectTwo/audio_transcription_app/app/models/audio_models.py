@@ -1,5 +1,6 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import List, Optional, Dict, Any
+from dataclasses import dataclass
 from datetime import datetime
 from enum import Enum
 
@@ -21,10 +22,10 @@ class TranscriptionStatus(str, Enum):
 
 class AudioFileModel(BaseModel):
     """Model for uploaded audio files"""
-    id: str
+    id: str = Field(min_length=1)
     filename: str
     original_filename: str
-    file_size: int
+    file_size: int = Field(ge=0)  # bytes
     duration_seconds: float
     format: str
     sample_rate: int
@@ -32,15 +33,12 @@ class AudioFileModel(BaseModel):
     upload_timestamp: datetime = Field(default_factory=datetime.now)
     processing_status: ProcessingStatus = ProcessingStatus.PENDING
     total_chunks: Optional[int] = None
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class AudioChunk(BaseModel):
     """Model for audio chunks created from the original file"""
+    model_config = ConfigDict(frozen=True)
+    
     id: str
     file_id: str
     chunk_index: int
@@ -48,17 +46,15 @@ class AudioChunk(BaseModel):
     end_time: float    # seconds
     duration: float    # seconds
     chunk_filename: str
+    etag: Optional[str] = None  # hash of the chunk audio, used for HTTP caching
     transcription_status: TranscriptionStatus = TranscriptionStatus.NOT_STARTED
     created_at: datetime = Field(default_factory=datetime.now)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class TranscriptionResult(BaseModel):
     """Model for transcription results from ElevenLabs API"""
+    model_config = ConfigDict(frozen=True)
+    
     chunk_id: str
     raw_transcription: str
     confidence_score: Optional[float] = None
@@ -66,11 +62,6 @@ class TranscriptionResult(BaseModel):
     processing_time: float  # seconds
     api_response_metadata: Optional[Dict[str, Any]] = None
     created_at: datetime = Field(default_factory=datetime.now)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class ValidationEdit(BaseModel):
@@ -83,11 +74,6 @@ class ValidationEdit(BaseModel):
     is_validated: bool = True
     editor_id: Optional[str] = None  # For future user management
     edited_at: datetime = Field(default_factory=datetime.now)
-    
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        }
 
 
 class ChunkWithTranscription(BaseModel):
@@ -140,8 +126,62 @@ class ErrorResponse(BaseModel):
     detail: Optional[str] = None
     error_code: Optional[str] = None
     timestamp: datetime = Field(default_factory=datetime.now)
+
+
+# Compact storage records
+#
+# The API models above carry a per-instance __dict__ plus Pydantic's
+# bookkeeping. The app keeps every chunk and transcription in memory, so
+# storage uses these slotted records instead, and responses are built from
+# their to_dict() output without going back through Pydantic. Records are
+# frozen because the same instance is shared by chunks_storage and
+# chunk_index.
+
+@dataclass(frozen=True)
+class AudioChunkRecord:
+    """Slotted in-memory form of AudioChunk"""
+    __slots__ = (
+        "id", "file_id", "chunk_index", "start_time", "end_time",
+        "duration", "chunk_filename", "etag", "transcription_status",
+        "created_at"
+    )
+    id: str
+    file_id: str
+    chunk_index: int
+    start_time: float
+    end_time: float
+    duration: float
+    chunk_filename: str
+    etag: Optional[str]
+    transcription_status: TranscriptionStatus
+    created_at: datetime
+    
+    @classmethod
+    def from_model(cls, chunk: AudioChunk) -> "AudioChunkRecord":
+        return cls(*(getattr(chunk, name) for name in cls.__slots__))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+@dataclass(frozen=True)
+class TranscriptionRecord:
+    """Slotted in-memory form of TranscriptionResult"""
+    __slots__ = (
+        "chunk_id", "raw_transcription", "confidence_score", "language",
+        "processing_time", "api_response_metadata", "created_at"
+    )
+    chunk_id: str
+    raw_transcription: str
+    confidence_score: Optional[float]
+    language: Optional[str]
+    processing_time: float
+    api_response_metadata: Optional[Dict[str, Any]]
+    created_at: datetime
+    
+    @classmethod
+    def from_model(cls, result: TranscriptionResult) -> "TranscriptionRecord":
+        return cls(*(getattr(result, name) for name in cls.__slots__))
     
-    class Config:
-        json_encoders = {
-            datetime: lambda v: v.isoformat()
-        } 
\ No newline at end of file
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
@@ -1,27 +1,109 @@
 import os
+import asyncio
+import math
 import uuid
+import wave
+import shutil
+import hashlib
+import threading
 import numpy as np
+from fastapi.concurrency import run_in_threadpool
 from pydub import AudioSegment
-from pydub.silence import split_on_silence, detect_silence
+from pydub.silence import detect_silence
 from typing import List, Tuple, Optional
 import logging
+from importlib.util import find_spec
 from pathlib import Path
 
 from ..models.audio_models import AudioFileModel, AudioChunk, ProcessingStatus
 
-# Try to import optional audio processing libraries
-try:
-    import librosa
-    import soundfile as sf
-    HAS_LIBROSA = True
-except ImportError:
-    HAS_LIBROSA = False
+# Check for optional audio processing libraries; only their availability
+# is reported, so they are located without being imported
+HAS_LIBROSA = find_spec("librosa") is not None and find_spec("soundfile") is not None
+if not HAS_LIBROSA:
     print("⚠️  Advanced audio processing libraries not available.")
     print("   For full functionality, install: pip install librosa soundfile")
     print("   The app will work with basic audio processing using pydub.")
 
+# Numba ships with librosa; when present the silence scan runs as a
+# compiled kernel instead of NumPy array passes
+try:
+    import numba
+    from numba import njit, prange
+    # With the TBB threading layer, running a parallel kernel from a worker
+    # thread (as the API server does) keeps the interpreter from exiting,
+    # so prefer OpenMP unless the deployment chose a layer itself
+    if "NUMBA_THREADING_LAYER_PRIORITY" not in os.environ:
+        numba.config.THREADING_LAYER_PRIORITY = ["omp", "tbb", "workqueue"]
+    HAS_NUMBA = True
+except ImportError:
+    HAS_NUMBA = False
+
 logger = logging.getLogger(__name__)
 
+# Windows scanned per parallel block by the compiled silence kernel
+SILENCE_SCAN_BLOCK = 4096
+
+# Chunks are planned in worker threads, but Numba's workqueue threading
+# layer (the fallback when neither OpenMP nor TBB is available) aborts the
+# process if two threads launch parallel kernels at once. The kernel uses
+# every core anyway, so running one scan at a time costs little.
+_SILENCE_KERNEL_LOCK = threading.Lock()
+
+
+if HAS_NUMBA:
+    try:
+        # The explicit signature compiles the kernel when the module is imported
+        # (or loads it from the on-disk cache) instead of on the first upload;
+        # samples is read-only because it wraps the AudioSegment's bytes
+        @njit(
+            numba.boolean[::1](
+                numba.types.Array(numba.int16, 1, "C", readonly=True),
+                numba.int64, numba.float64, numba.int64, numba.int64, numba.int64
+            ),
+            parallel=True, cache=True, nogil=True
+        )
+        def _silent_mask(samples, channels, frame_step, window_ms, n_windows, limit):
+            """
+            Mark which 1ms-spaced windows of window_ms are silent.
+        
+            Each block of windows sums its first window once and then slides,
+            adding the frames that enter and subtracting the frames that leave,
+            so no per-sample intermediate arrays are allocated. A window is
+            silent when energy < limit * samples, which is pydub's
+            int(rms) <= threshold as an exact integer comparison.
+            """
+            frame_count = len(samples) // channels
+            mask = np.empty(n_windows, dtype=np.bool_)
+            n_blocks = (n_windows + SILENCE_SCAN_BLOCK - 1) // SILENCE_SCAN_BLOCK
+            for block in prange(n_blocks):
+                first = block * SILENCE_SCAN_BLOCK
+                last = min(first + SILENCE_SCAN_BLOCK, n_windows)
+                start = int(first * frame_step)
+                end = int((first + window_ms) * frame_step)
+                energy = 0
+                for k in range(start * channels, min(end, frame_count) * channels):
+                    energy += np.int64(samples[k]) * samples[k]
+                for i in range(first, last):
+                    if i > first:
+                        # Frames past the data are padding and add no energy
+                        new_start = int(i * frame_step)
+                        new_end = int((i + window_ms) * frame_step)
+                        for k in range(start * channels, min(new_start, frame_count) * channels):
+                            energy -= np.int64(samples[k]) * samples[k]
+                        for k in range(min(end, frame_count) * channels, min(new_end, frame_count) * channels):
+                            energy += np.int64(samples[k]) * samples[k]
+                        start = new_start
+                        end = new_end
+                    sample_count = (end - start) * channels
+                    mask[i] = sample_count == 0 or energy < limit * sample_count
+            return mask
+    except Exception as e:
+        # A compile or cache failure (e.g. a mismatched numba/LLVM build)
+        # must not stop the app from loading; the NumPy scan still works
+        logger.warning(f"Compiled silence scan unavailable, using NumPy: {str(e)}")
+        HAS_NUMBA = False
+
 
 class AudioProcessor:
     """
@@ -39,16 +121,19 @@ class AudioProcessor:
                  chunk_duration: int = 30,  # seconds
                  min_silence_len: int = 500,  # milliseconds
                  silence_thresh: int = -40,  # dB
-                 output_dir: str = "./audio_files"):
+                 output_dir: str = "./audio_files",
+                 decode_cache_size: int = 32):  # decoded uploads kept on disk
         self.chunk_duration = chunk_duration * 1000  # Convert to milliseconds
         self.min_silence_len = min_silence_len
         self.silence_thresh = silence_thresh
         self.output_dir = Path(output_dir)
         self.output_dir.mkdir(exist_ok=True)
+        self.decode_cache_size = decode_cache_size
         
         # Create subdirectories
         (self.output_dir / "chunks").mkdir(exist_ok=True)
         (self.output_dir / "temp").mkdir(exist_ok=True)
+        (self.output_dir / "cache").mkdir(exist_ok=True)
         
         # Log available features
         if HAS_LIBROSA:
@@ -69,11 +154,11 @@ class AudioProcessor:
         try:
             logger.info(f"Starting audio processing for {filename}")
             
-            # Load and analyze audio file
-            audio_info = await self._analyze_audio_file(file_path, filename)
+            # Load and analyze audio file (decoded once, reused for chunking)
+            audio_info, audio = await self._analyze_audio_file(file_path, filename)
             
             # Create chunks
-            chunks = await self._create_intelligent_chunks(file_path, audio_info.id)
+            chunks = await self._create_intelligent_chunks(audio, audio_info.id)
             
             # Update audio info with chunk count
             audio_info.total_chunks = len(chunks)
@@ -86,39 +171,30 @@ class AudioProcessor:
             logger.error(f"Error processing audio file {filename}: {str(e)}")
             raise
     
-    async def _analyze_audio_file(self, file_path: str, filename: str) -> AudioFileModel:
+    async def _analyze_audio_file(self, file_path: str, filename: str) -> Tuple[AudioFileModel, AudioSegment]:
         """
         Analyze audio file properties.
         
-        Educational note: This shows how to handle optional dependencies gracefully.
+        Returns the file metadata together with the decoded audio, so the
+        file only has to be decoded once per upload.
         """
         try:
             # Load with pydub (always available)
-            audio = AudioSegment.from_file(file_path)
+            audio, wav_path = await self._load_audio(file_path)
             
             file_id = str(uuid.uuid4())
             processed_filename = f"{file_id}_{filename}"
             
             # Move file to processed location
             processed_path = self.output_dir / processed_filename
-            audio.export(processed_path, format="wav")
+            await run_in_threadpool(self._store_processed_file, wav_path, audio, processed_path)
             
-            # Use librosa for detailed analysis if available, otherwise use pydub
-            if HAS_LIBROSA:
-                try:
-                    y, sr = librosa.load(file_path, sr=None)
-                    duration = librosa.duration(y=y, sr=sr)
-                    sample_rate = sr
-                except Exception as e:
-                    logger.warning(f"Librosa analysis failed, using pydub: {e}")
-                    duration = len(audio) / 1000.0  # Convert ms to seconds
-                    sample_rate = audio.frame_rate
-            else:
-                # Fallback to pydub analysis
-                duration = len(audio) / 1000.0  # Convert ms to seconds
-                sample_rate = audio.frame_rate
+            # Duration and sample rate come straight from the decoded audio;
+            # decoding the file again with librosa would only repeat the work
+            duration = len(audio) / 1000.0  # Convert ms to seconds
+            sample_rate = audio.frame_rate
             
-            return AudioFileModel(
+            audio_info = AudioFileModel(
                 id=file_id,
                 filename=processed_filename,
                 original_filename=filename,
@@ -129,12 +205,121 @@ class AudioProcessor:
                 channels=audio.channels,
                 processing_status=ProcessingStatus.PROCESSING
             )
+            return audio_info, audio
             
         except Exception as e:
             logger.error(f"Error analyzing audio file: {str(e)}")
             raise
     
-    async def _create_intelligent_chunks(self, file_path: str, file_id: str) -> List[AudioChunk]:
+    async def _load_audio(self, file_path: str) -> Tuple[AudioSegment, Optional[Path]]:
+        """
+        Decode an upload, reusing the decode of an identical earlier upload.
+        
+        Returns the audio and, when there is one, a WAV file holding exactly
+        that audio: the upload itself, or its entry in the decode cache.
+        Other formats go through ffmpeg, so their decoded PCM is kept as WAV
+        in output_dir/cache, keyed by a hash of the upload, for the most
+        recently used decode_cache_size files.
+        """
+        if Path(file_path).suffix.lower() == ".wav" or self.decode_cache_size <= 0:
+            # WAV is read in-process, so there is no decode worth caching
+            audio = await run_in_threadpool(AudioSegment.from_file, file_path)
+            return audio, (Path(file_path) if self._is_wav_file(file_path) else None)
+        
+        digest = await run_in_threadpool(self._file_digest, file_path)
+        cached_path = self.output_dir / "cache" / f"{digest}.wav"
+        try:
+            audio = await run_in_threadpool(AudioSegment.from_wav, cached_path)
+        except Exception as e:
+            # A miss, unless the entry exists but can't be read; then it is
+            # dropped and replaced by a fresh decode below
+            if cached_path.exists():
+                logger.warning(f"Discarding unreadable cached decode {cached_path.name}: {e}")
+                try:
+                    os.unlink(cached_path)
+                except OSError:
+                    pass
+        else:
+            try:
+                os.utime(cached_path)  # mark as recently used
+            except FileNotFoundError:
+                pass  # just evicted; _store_processed_file re-exports
+            logger.info(f"Reusing cached decode of {file_path}")
+            return audio, cached_path
+        
+        audio = await run_in_threadpool(AudioSegment.from_file, file_path)
+        try:
+            await run_in_threadpool(self._cache_decoded_audio, audio, cached_path)
+        except OSError as e:
+            logger.warning(f"Could not cache decoded audio: {e}")
+            return audio, None
+        return audio, cached_path
+    
+    @staticmethod
+    def _file_digest(file_path: str) -> str:
+        """Hash a file in 64 KiB blocks."""
+        digest = hashlib.blake2b(digest_size=20)
+        with open(file_path, "rb") as f:
+            while block := f.read(64 * 1024):
+                digest.update(block)
+        return digest.hexdigest()
+    
+    def _cache_decoded_audio(self, audio: AudioSegment, cached_path: Path):
+        """Store decoded audio in the cache, evicting the least recently used."""
+        # Write under a unique name and rename, so concurrent uploads of the
+        # same file never see a partial entry
+        temp_path = cached_path.with_name(f".{uuid.uuid4()}.tmp")
+        audio.export(temp_path, format="wav")
+        os.replace(temp_path, cached_path)
+        
+        with os.scandir(cached_path.parent) as entries:
+            cached = sorted(
+                (entry.stat().st_mtime, entry.path)
+                for entry in entries if entry.name.endswith(".wav")
+            )
+        for _, stale_path in cached[:-self.decode_cache_size]:
+            try:
+                os.unlink(stale_path)
+            except FileNotFoundError:
+                pass
+    
+    def _store_processed_file(self, wav_path: Optional[Path], audio: AudioSegment, processed_path: Path):
+        """
+        Keep a WAV copy of the upload in the output directory.
+        
+        When the audio already exists as a WAV file (a WAV upload or a cached
+        decode) it is hard-linked (or copied); otherwise it is exported.
+        """
+        if wav_path is not None:
+            try:
+                os.link(wav_path, processed_path)
+                return
+            except FileNotFoundError:
+                # A cache entry evicted by a concurrent upload since the hit
+                pass
+            except OSError:
+                # Different filesystem (or no hard links): copy instead
+                try:
+                    shutil.copyfile(wav_path, processed_path)
+                    return
+                except FileNotFoundError:
+                    pass
+        
+        audio.export(processed_path, format="wav")
+    
+    @staticmethod
+    def _is_wav_file(file_path: str) -> bool:
+        """Check for a .wav name and a RIFF/WAVE header."""
+        if Path(file_path).suffix.lower() != ".wav":
+            return False
+        try:
+            with open(file_path, "rb") as f:
+                header = f.read(12)
+        except OSError:
+            return False
+        return header[:4] == b"RIFF" and header[8:12] == b"WAVE"
+    
+    async def _create_intelligent_chunks(self, audio: AudioSegment, file_id: str) -> List[AudioChunk]:
         """
         Create intelligent audio chunks that respect word boundaries.
         
@@ -144,20 +329,30 @@ class AudioProcessor:
         - Audio processing best practices
         - Graceful handling of missing dependencies
         """
-        audio = AudioSegment.from_file(file_path)
-        chunks = []
+        # Silence detection and chunk planning are CPU-bound, so they run in
+        # a worker thread to keep the event loop responsive
+        chunks = await run_in_threadpool(self._plan_chunks, audio, file_id)
+        
+        # Write the chunk files concurrently in worker threads so the disk
+        # I/O doesn't block the event loop
+        await asyncio.gather(*(
+            run_in_threadpool(self._write_chunk, chunk, frames, audio)
+            for chunk, frames in chunks
+        ))
         
+        return [chunk for chunk, _ in chunks]
+    
+    def _plan_chunks(self, audio: AudioSegment, file_id: str) -> List[Tuple[AudioChunk, bytes]]:
+        """Choose chunk boundaries and build chunk metadata (blocking)."""
         # Method 1: Try silence-based splitting first
         silence_chunks = self._split_on_silence(audio)
         
         if len(silence_chunks) > 1:
             # Combine small chunks to reach target duration
-            chunks = self._combine_chunks_to_target_duration(silence_chunks, file_id)
-        else:
-            # Method 2: Fall back to time-based chunking with overlap
-            chunks = self._create_time_based_chunks(audio, file_id)
+            return self._combine_chunks_to_target_duration(silence_chunks, file_id)
         
-        return chunks
+        # Method 2: Fall back to time-based chunking with overlap
+        return self._create_time_based_chunks(audio, file_id)
     
     def _split_on_silence(self, audio: AudioSegment) -> List[AudioSegment]:
         """
@@ -168,22 +363,39 @@ class AudioProcessor:
         """
         try:
             # Detect silence periods
-            silence_ranges = detect_silence(
-                audio,
-                min_silence_len=self.min_silence_len,
-                silence_thresh=self.silence_thresh
-            )
+            silence_ranges = self._detect_silence(audio)
             
             if not silence_ranges:
                 return [audio]
             
-            # Split on silence
-            chunks = split_on_silence(
-                audio,
-                min_silence_len=self.min_silence_len,
-                silence_thresh=self.silence_thresh,
-                keep_silence=100  # Keep 100ms of silence for natural flow
-            )
+            # Split on silence, keeping 100ms of silence for natural flow
+            # (same ranges as pydub's split_on_silence)
+            keep_silence = 100
+            audio_len = len(audio)
+            if silence_ranges[0] == [0, audio_len]:
+                return [audio]
+            
+            output_ranges = []
+            prev_end = 0
+            for start, end in silence_ranges:
+                output_ranges.append([prev_end, start])
+                prev_end = end
+            if prev_end != audio_len:
+                output_ranges.append([prev_end, audio_len])
+            if output_ranges[0] == [0, 0]:
+                output_ranges.pop(0)
+            
+            for output_range in output_ranges:
+                output_range[0] -= keep_silence
+                output_range[1] += keep_silence
+            
+            # Silence shorter than twice keep_silence is shared evenly
+            for range_i, range_ii in zip(output_ranges, output_ranges[1:]):
+                if range_ii[0] < range_i[1]:
+                    range_i[1] = (range_i[1] + range_ii[0]) // 2
+                    range_ii[0] = range_i[1]
+            
+            chunks = [audio[max(start, 0):min(end, audio_len)] for start, end in output_ranges]
             
             # Filter out very short chunks (less than 5 seconds)
             min_chunk_duration = 5000  # 5 seconds in milliseconds
@@ -195,98 +407,189 @@ class AudioProcessor:
             logger.warning(f"Silence-based splitting failed: {str(e)}")
             return [audio]
     
+    def _detect_silence(self, audio: AudioSegment) -> List[List[int]]:
+        """
+        Find silent ranges [start_ms, end_ms], matching pydub's detect_silence.
+        
+        pydub measures the RMS of every min_silence_len window separately,
+        one millisecond apart. 16-bit audio is scanned by the compiled
+        _silent_mask kernel when Numba is available; otherwise a cumulative
+        sum of squared samples gives all window energies at once in NumPy.
+        """
+        audio_len = len(audio)
+        window_ms = self.min_silence_len
+        if audio_len < window_ms:
+            return []
+        
+        if audio.sample_width not in (1, 2, 4):
+            # 24-bit samples have no NumPy dtype; use pydub's scan
+            return detect_silence(audio, min_silence_len=window_ms,
+                                  silence_thresh=self.silence_thresh)
+        
+        silence_thresh = 10 ** (self.silence_thresh / 20) * audio.max_possible_amplitude
+        n_windows = audio_len - window_ms + 1
+        frame_step = audio.frame_rate / 1000.0
+        
+        # int(rms) <= thresh  <=>  energy / n < (floor(thresh) + 1) ** 2, so
+        # windows can be tested on integer energies without a square root
+        limit = (math.floor(silence_thresh) + 1) ** 2
+        
+        if HAS_NUMBA and audio.sample_width == 2:
+            samples = np.frombuffer(audio.raw_data, dtype=np.int16)
+            with _SILENCE_KERNEL_LOCK:
+                silent = _silent_mask(samples, audio.channels, frame_step, window_ms, n_windows, limit)
+        else:
+            silent = self._silent_windows(audio, frame_step, window_ms, n_windows, silence_thresh, limit)
+        
+        silence_starts = np.flatnonzero(silent)
+        if len(silence_starts) == 0:
+            return []
+        
+        # Merge silent windows into ranges wherever consecutive windows overlap
+        gaps = np.diff(silence_starts)
+        breaks = np.flatnonzero((gaps != 1) & (gaps > window_ms))
+        range_starts = silence_starts[np.concatenate(([0], breaks + 1))]
+        range_ends = silence_starts[np.concatenate((breaks, [len(silence_starts) - 1]))] + window_ms
+        
+        return [[int(start), int(end)] for start, end in zip(range_starts, range_ends)]
+    
+    def _silent_windows(self, audio: AudioSegment, frame_step: float, window_ms: int,
+                        n_windows: int, silence_thresh: float, limit: int) -> np.ndarray:
+        """Mark which 1ms-spaced windows are silent, using NumPy."""
+        # Sums of squared 32-bit samples can overflow int64; accumulate those
+        # in float64 like audioop does
+        energy_dtype = np.float64 if audio.sample_width == 4 else np.int64
+        samples = np.frombuffer(audio.raw_data, dtype=f"<i{audio.sample_width}")
+        samples = samples[:len(samples) - len(samples) % audio.channels]
+        frame_energy = np.square(samples, dtype=energy_dtype).reshape(-1, audio.channels).sum(axis=1)
+        energy_csum = np.concatenate(([0], np.cumsum(frame_energy)))
+        frame_count = len(frame_energy)
+        
+        # Frame offset of every millisecond, computed as pydub slices them
+        frame_bounds = (np.arange(n_windows + window_ms) * frame_step).astype(np.int64)
+        window_starts = frame_bounds[:n_windows]
+        window_ends = frame_bounds[window_ms:]
+        
+        # pydub pads a window running past the data with silence, which
+        # counts toward its length but adds no energy
+        energy = (energy_csum[np.minimum(window_ends, frame_count)]
+                  - energy_csum[np.minimum(window_starts, frame_count)])
+        sample_count = (window_ends - window_starts) * audio.channels
+        if energy_dtype is np.int64:
+            return (sample_count == 0) | (energy < limit * sample_count)
+        
+        # Float energies of 32-bit audio are compared as pydub does
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rms = np.where(sample_count > 0, np.floor(np.sqrt(energy / sample_count)), 0)
+        return rms <= silence_thresh
+    
     def _combine_chunks_to_target_duration(self, 
                                          silence_chunks: List[AudioSegment], 
-                                         file_id: str) -> List[AudioChunk]:
+                                         file_id: str) -> List[Tuple[AudioChunk, bytes]]:
         """
         Combine silence-based chunks to reach target duration.
         
+        Returns each chunk's metadata with the audio frames still to be written.
         This demonstrates optimization algorithms in AI applications.
         """
         combined_chunks = []
-        current_chunk = AudioSegment.empty()
-        chunk_start_time = 0
-        chunk_index = 0
+        if not silence_chunks:
+            return combined_chunks
         
-        for i, segment in enumerate(silence_chunks):
-            # Check if adding this segment would exceed target duration
-            if len(current_chunk) > 0 and len(current_chunk) + len(segment) > self.chunk_duration:
-                # Save current chunk
-                audio_chunk = self._save_chunk(
-                    current_chunk, 
-                    file_id, 
-                    chunk_index, 
-                    chunk_start_time / 1000,  # Convert to seconds
-                    (chunk_start_time + len(current_chunk)) / 1000
-                )
-                combined_chunks.append(audio_chunk)
-                
-                # Start new chunk
-                current_chunk = segment
-                chunk_start_time = chunk_start_time + len(current_chunk) if chunk_index > 0 else 0
-                chunk_index += 1
-            else:
-                # Add segment to current chunk
-                if len(current_chunk) == 0:
-                    chunk_start_time = sum(len(chunk) for chunk in silence_chunks[:i])
-                current_chunk += segment
-        
-        # Don't forget the last chunk
-        if len(current_chunk) > 0:
-            audio_chunk = self._save_chunk(
-                current_chunk, 
+        frame_rate = silence_chunks[0].frame_rate
+        max_frames = self.chunk_duration * frame_rate // 1000
+        
+        # Start offset of every segment, in ms and in frames, computed once
+        segment_starts = np.concatenate(([0], np.cumsum([len(segment) for segment in silence_chunks])))
+        frame_starts = np.concatenate(([0], np.cumsum([int(segment.frame_count()) for segment in silence_chunks])))
+        
+        first = 0
+        chunk_index = 0
+        while first < len(silence_chunks):
+            # Greedily take every following segment that still fits in the
+            # target duration; a segment longer than that becomes its own chunk
+            last = int(np.searchsorted(frame_starts, frame_starts[first] + max_frames, side="right")) - 1
+            last = max(last, first + 1)
+            
+            frames = self._join_segments(silence_chunks[first:last])
+            chunk_start_time = int(segment_starts[first])
+            chunk_len = round(1000 * int(frame_starts[last] - frame_starts[first]) / frame_rate)
+            audio_chunk = self._build_chunk(
+                frames, 
                 file_id, 
-                chunk_index,
-                chunk_start_time / 1000,
-                (chunk_start_time + len(current_chunk)) / 1000
+                chunk_index, 
+                chunk_start_time / 1000,  # Convert to seconds
+                (chunk_start_time + chunk_len) / 1000
             )
-            combined_chunks.append(audio_chunk)
+            combined_chunks.append((audio_chunk, frames))
+            
+            first = last
+            chunk_index += 1
         
         return combined_chunks
     
-    def _create_time_based_chunks(self, audio: AudioSegment, file_id: str) -> List[AudioChunk]:
+    @staticmethod
+    def _join_segments(segments: List[AudioSegment]) -> bytes:
+        """Return the frames of segments cut from the same audio, copied once."""
+        if len(segments) == 1:
+            return segments[0].raw_data
+        return b"".join(segment.raw_data for segment in segments)
+    
+    def _create_time_based_chunks(self, audio: AudioSegment, file_id: str) -> List[Tuple[AudioChunk, memoryview]]:
         """
         Create time-based chunks as fallback method.
         
+        Returns each chunk's metadata with the audio frames still to be
+        written, as views into the decoded audio rather than copies.
         Educational note: Always have fallback strategies in production systems.
         """
         chunks = []
         total_duration = len(audio)
         chunk_index = 0
         
+        raw_frames = memoryview(audio.raw_data)
+        frame_count = int(audio.frame_count())
+        frames_per_ms = audio.frame_rate / 1000.0
+        
         for start_ms in range(0, total_duration, self.chunk_duration):
             end_ms = min(start_ms + self.chunk_duration, total_duration)
-            chunk_audio = audio[start_ms:end_ms]
             
-            audio_chunk = self._save_chunk(
-                chunk_audio,
+            # Same frame boundaries as pydub's audio[start_ms:end_ms]
+            start_frame = int(start_ms * frames_per_ms)
+            end_frame = min(int(end_ms * frames_per_ms), frame_count)
+            frames = raw_frames[start_frame * audio.frame_width:end_frame * audio.frame_width]
+            
+            audio_chunk = self._build_chunk(
+                frames,
                 file_id,
                 chunk_index,
                 start_ms / 1000,  # Convert to seconds
                 end_ms / 1000
             )
-            chunks.append(audio_chunk)
+            chunks.append((audio_chunk, frames))
             chunk_index += 1
         
         return chunks
     
-    def _save_chunk(self, 
-                   chunk_audio: AudioSegment, 
-                   file_id: str, 
-                   chunk_index: int,
-                   start_time: float,
-                   end_time: float) -> AudioChunk:
+    def _build_chunk(self, 
+                    frames: bytes, 
+                    file_id: str, 
+                    chunk_index: int,
+                    start_time: float,
+                    end_time: float) -> AudioChunk:
         """
-        Save audio chunk to file and create metadata.
+        Create metadata for an audio chunk; the file is written by _write_chunk.
         
         This shows proper file management in production applications.
         """
-        chunk_id = str(uuid.uuid4())
-        chunk_filename = f"chunk_{file_id}_{chunk_index:03d}_{chunk_id}.wav"
-        chunk_path = self.output_dir / "chunks" / chunk_filename
+        # The file id is already a UUID, so the chunk index alone makes
+        # chunk ids and file names unique without drawing another one
+        chunk_id = f"{file_id}-{chunk_index:03d}"
+        chunk_filename = f"chunk_{file_id}_{chunk_index:03d}.wav"
         
-        # Export chunk as WAV for consistency
-        chunk_audio.export(chunk_path, format="wav")
+        # Chunk files never change once written, so a content hash computed
+        # now can serve as the HTTP ETag for every later download
+        etag = hashlib.blake2b(frames, digest_size=8).hexdigest()
         
         return AudioChunk(
             id=chunk_id,
@@ -295,28 +598,47 @@ class AudioProcessor:
             start_time=start_time,
             end_time=end_time,
             duration=end_time - start_time,
-            chunk_filename=chunk_filename
+            chunk_filename=chunk_filename,
+            etag=etag
         )
     
+    def _write_chunk(self, chunk: AudioChunk, frames: bytes, audio: AudioSegment):
+        """
+        Write a chunk's frames to its WAV file, in the format of the audio
+        they were cut from (blocking; run in a worker thread).
+        """
+        # Export chunk as WAV for consistency. This is what pydub's WAV export
+        # does (the stdlib wave module, no ffmpeg), but it writes the frames
+        # directly, so views into the decoded audio are never copied
+        with wave.open(str(self.get_chunk_file_path(chunk.chunk_filename)), "wb") as wav_file:
+            wav_file.setnchannels(audio.channels)
+            wav_file.setsampwidth(audio.sample_width)
+            wav_file.setframerate(audio.frame_rate)
+            wav_file.writeframes(frames)
+    
     def get_chunk_file_path(self, chunk_filename: str) -> Path:
         """Get the full path to a chunk file."""
         return self.output_dir / "chunks" / chunk_filename
     
-    def cleanup_temp_files(self, file_id: str):
-        """Clean up temporary files for a specific file ID."""
+    def cleanup_temp_files(self, file_id: str) -> int:
+        """Clean up temporary files for a specific file ID; returns how many were removed."""
+        removed = 0
         try:
-            # Remove chunks
-            chunk_pattern = f"chunk_{file_id}_*"
-            for chunk_file in (self.output_dir / "chunks").glob(chunk_pattern):
-                chunk_file.unlink()
-            
-            # Remove original processed file
-            for file in self.output_dir.glob(f"{file_id}_*"):
-                file.unlink()
+            # Remove chunks, then the original processed file. File names
+            # start with a known prefix, so a plain prefix test per directory
+            # entry replaces glob's pattern matching
+            for directory, prefix in ((self.output_dir / "chunks", f"chunk_{file_id}_"),
+                                      (self.output_dir, f"{file_id}_")):
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        if entry.name.startswith(prefix) and entry.is_file():
+                            os.unlink(entry.path)
+                            removed += 1
                 
-            logger.info(f"Cleaned up files for {file_id}")
+            logger.info(f"Cleaned up {removed} files for {file_id}")
         except Exception as e:
             logger.error(f"Error cleaning up files for {file_id}: {str(e)}")
+        return removed
 
 
 # Example usage and testing functions for educational purposes
@@ -346,5 +668,4 @@ async def demonstrate_chunking_strategies():
 
 
 if __name__ == "__main__":
-    import asyncio
     asyncio.run(demonstrate_chunking_strategies()) 
\ No newline at end of file
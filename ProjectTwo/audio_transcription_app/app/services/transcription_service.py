@@ -1,12 +1,16 @@
 import asyncio
+import aiofiles
 import aiohttp
 import time
 import logging
+import hashlib
+from collections import OrderedDict
 from typing import Optional, Dict, Any, List
 from pathlib import Path
 import json
 import os
 from dotenv import load_dotenv
+from fastapi.concurrency import run_in_threadpool
 
 from ..models.audio_models import (
     AudioChunk, 
@@ -20,6 +24,21 @@ load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# ElevenLabs model used for every transcription request
+TRANSCRIPTION_MODEL = "eleven_multilingual_v2"
+
+# Texts returned by the mock service, picked by chunk index
+MOCK_TRANSCRIPTIONS = (
+    "This is the transcription for audio chunk {number}. ",
+    "The audio segment from {start:.1f} to {end:.1f} seconds contains speech. ",
+    "This chunk has a duration of {duration:.1f} seconds and represents part of the original audio. ",
+    "In a real application, this would be the actual transcribed text from the ElevenLabs API. ",
+    "The transcription quality would depend on audio clarity, language, and background noise. ",
+    "Users can edit this text to correct any transcription errors. ",
+    "This interactive editing feature is crucial for high-quality results. ",
+    "The application demonstrates proper error handling and user feedback loops. "
+)
+
 
 class ElevenLabsTranscriptionService:
     """
@@ -30,6 +49,7 @@ class ElevenLabsTranscriptionService:
     - Rate limiting and error handling
     - Asynchronous processing
     - Configuration management
+    - Caching results by audio content
     """
     
     def __init__(self):
@@ -44,6 +64,59 @@ class ElevenLabsTranscriptionService:
             self._use_mock = True
         else:
             self._use_mock = False
+        
+        # Multiplier for the simulated latency of the mock service
+        self.mock_sleep_scale = float(os.getenv("MOCK_SLEEP_SCALE", "1.0"))
+        
+        # One limit on in-flight API requests shared by every file being
+        # transcribed, so concurrent uploads cannot multiply the load
+        self.max_concurrent = int(os.getenv("TRANSCRIBE_CONCURRENCY", "16"))
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        
+        # Shared HTTP session, opened on the running event loop by the
+        # async context manager (or lazily on first use)
+        self._session: Optional[aiohttp.ClientSession] = None
+        
+        # LRU cache of transcriptions keyed by a hash of the chunk audio, so
+        # re-uploaded or identical audio never hits the API twice
+        self.cache_size = int(os.getenv("TRANSCRIPTION_CACHE_SIZE", "2048"))
+        self._cache: "OrderedDict[str, TranscriptionResult]" = OrderedDict()
+    
+    async def __aenter__(self) -> "ElevenLabsTranscriptionService":
+        self._get_session()
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+    
+    def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Return the shared HTTP session, creating it if needed.
+        
+        Educational note: reusing one session keeps connections alive
+        between requests instead of reconnecting for every chunk.
+        """
+        if self._session is None or self._session.closed:
+            # Pool sized to the transcription concurrency, plus one connection
+            # so status checks never queue behind in-flight uploads; idle
+            # connections and DNS results are kept for reuse between files
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrent + 1,
+                limit_per_host=self.max_concurrent + 1,
+                keepalive_timeout=60,
+                ttl_dns_cache=300
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            )
+        return self._session
+    
+    async def close(self):
+        """Close the shared HTTP session."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
     
     async def transcribe_chunk(self, chunk: AudioChunk, audio_file_path: Path) -> TranscriptionResult:
         """
@@ -55,6 +128,21 @@ class ElevenLabsTranscriptionService:
         start_time = time.time()
         
         try:
+            cache_key = await run_in_threadpool(self._cache_key, audio_file_path)
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self._cache.move_to_end(cache_key)
+                return cached.model_copy(update={
+                    "chunk_id": chunk.id,
+                    "processing_time": time.time() - start_time,
+                    "api_response_metadata": {
+                        **(cached.api_response_metadata or {}),
+                        "chunk_duration": chunk.duration,
+                        "chunk_index": chunk.chunk_index,
+                        "cache_hit": True
+                    }
+                })
+            
             if self._use_mock:
                 # Use mock service for demonstration
                 transcription_text = await self._mock_transcription(chunk, audio_file_path)
@@ -64,7 +152,7 @@ class ElevenLabsTranscriptionService:
             
             processing_time = time.time() - start_time
             
-            return TranscriptionResult(
+            result = TranscriptionResult(
                 chunk_id=chunk.id,
                 raw_transcription=transcription_text,
                 confidence_score=0.95,  # Mock confidence score
@@ -76,6 +164,8 @@ class ElevenLabsTranscriptionService:
                     "chunk_index": chunk.chunk_index
                 }
             )
+            self._cache_put(cache_key, result)
+            return result
             
         except Exception as e:
             logger.error(f"Error transcribing chunk {chunk.id}: {str(e)}")
@@ -83,43 +173,43 @@ class ElevenLabsTranscriptionService:
     
     async def transcribe_multiple_chunks(self, 
                                        chunks: List[AudioChunk], 
-                                       audio_files_dir: Path,
-                                       max_concurrent: int = 3) -> List[TranscriptionResult]:
+                                       audio_files_dir: Path) -> List[TranscriptionResult]:
         """
         Transcribe multiple chunks with concurrency control.
         
+        Every call shares the service-wide semaphore (TRANSCRIBE_CONCURRENCY),
+        so the number of in-flight API requests is bounded across all files.
+        Chunks must already be in playback (chunk_index) order, as the upload
+        stores them; results come back in the same order.
+        
         This demonstrates:
         - Concurrent processing for efficiency
         - Rate limiting to respect API limits
         - Progress tracking
         """
-        semaphore = asyncio.Semaphore(max_concurrent)
-        results = []
+        if self._semaphore is None:
+            # Created lazily so it belongs to the running event loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        semaphore = self._semaphore
+        
+        # Progress is logged about every 5% rather than for every chunk
+        completed = 0
+        log_every = max(1, len(chunks) // 20)
         
         async def transcribe_with_semaphore(chunk: AudioChunk) -> TranscriptionResult:
+            nonlocal completed
             async with semaphore:
                 chunk_path = audio_files_dir / "chunks" / chunk.chunk_filename
-                return await self.transcribe_chunk(chunk, chunk_path)
-        
-        # Create tasks for all chunks
-        tasks = [transcribe_with_semaphore(chunk) for chunk in chunks]
-        
-        # Execute with progress tracking
-        completed = 0
-        for coro in asyncio.as_completed(tasks):
-            result = await coro
-            results.append(result)
-            completed += 1
+                result = await self.transcribe_chunk(chunk, chunk_path)
             
-            progress = (completed / len(chunks)) * 100
-            logger.info(f"Transcription progress: {progress:.1f}% ({completed}/{len(chunks)})")
-        
-        # Sort results by chunk index to maintain order
-        results.sort(key=lambda r: next(
-            chunk.chunk_index for chunk in chunks if chunk.id == r.chunk_id
-        ))
+            completed += 1
+            if completed % log_every == 0 or completed == len(chunks):
+                progress = (completed / len(chunks)) * 100
+                logger.info(f"Transcription progress: {progress:.1f}% ({completed}/{len(chunks)})")
+            return result
         
-        return results
+        # gather returns results in task order, i.e. in playback order
+        return await asyncio.gather(*(transcribe_with_semaphore(chunk) for chunk in chunks))
     
     async def _call_elevenlabs_api(self, audio_file_path: Path) -> str:
         """
@@ -132,38 +222,38 @@ class ElevenLabsTranscriptionService:
             "xi-api-key": self.api_key,
         }
         
-        # Prepare multipart form data
-        data = aiohttp.FormData()
-        
-        # Read audio file
-        with open(audio_file_path, 'rb') as f:
-            data.add_field('audio', f, filename=audio_file_path.name, content_type='audio/wav')
-        
-        # Add other parameters
-        data.add_field('model', 'eleven_multilingual_v2')
-        data.add_field('response_format', 'json')
+        # Read audio file without blocking the event loop
+        async with aiofiles.open(audio_file_path, 'rb') as f:
+            audio_bytes = await f.read()
         
         url = f"{self.base_url}/speech-to-text"
         
         for attempt in range(self.max_retries):
             try:
-                async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=self.timeout)) as session:
-                    async with session.post(url, headers=headers, data=data) as response:
-                        if response.status == 200:
-                            result = await response.json()
-                            return result.get('text', '')
-                        elif response.status == 429:  # Rate limited
-                            if attempt < self.max_retries - 1:
-                                wait_time = self.retry_delay * (2 ** attempt)
-                                logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
-                                await asyncio.sleep(wait_time)
-                                continue
-                            else:
-                                raise Exception("Rate limited after max retries")
+                # A FormData body can only be sent once, so every attempt
+                # builds its own
+                data = aiohttp.FormData()
+                data.add_field('audio', audio_bytes, filename=audio_file_path.name, content_type='audio/wav')
+                data.add_field('model', TRANSCRIPTION_MODEL)
+                data.add_field('response_format', 'json')
+                
+                session = self._get_session()
+                async with session.post(url, headers=headers, data=data) as response:
+                    if response.status == 200:
+                        result = await response.json()
+                        return result.get('text', '')
+                    elif response.status == 429:  # Rate limited
+                        if attempt < self.max_retries - 1:
+                            wait_time = self.retry_delay * (2 ** attempt)
+                            logger.warning(f"Rate limited. Waiting {wait_time}s before retry...")
+                            await asyncio.sleep(wait_time)
+                            continue
                         else:
-                            error_text = await response.text()
-                            raise Exception(f"API error {response.status}: {error_text}")
-                            
+                            raise Exception("Rate limited after max retries")
+                    else:
+                        error_text = await response.text()
+                        raise Exception(f"API error {response.status}: {error_text}")
+                        
             except asyncio.TimeoutError:
                 if attempt < self.max_retries - 1:
                     logger.warning(f"Timeout on attempt {attempt + 1}. Retrying...")
@@ -181,6 +271,52 @@ class ElevenLabsTranscriptionService:
         
         raise Exception("Max retries exceeded")
     
+    def _cache_key(self, audio_file_path: Path) -> str:
+        """
+        Hash the chunk audio in 64 KiB blocks.
+        
+        The service mode and model are part of the key so mock results are
+        never returned once a real API key is configured.
+        """
+        digest = hashlib.blake2b(digest_size=20)
+        with open(audio_file_path, 'rb') as f:
+            for block in iter(lambda: f.read(64 * 1024), b''):
+                digest.update(block)
+        service = "mock" if self._use_mock else TRANSCRIPTION_MODEL
+        return f"{service}:{digest.hexdigest()}"
+    
+    def _cache_put(self, cache_key: str, result: TranscriptionResult):
+        """Insert a result and evict the least recently used entries."""
+        self._cache[cache_key] = result
+        self._cache.move_to_end(cache_key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
+    def load_cache(self, cache_file: Path):
+        """Load cached transcriptions saved by a previous run, if any."""
+        try:
+            with open(cache_file, 'r') as f:
+                entries = json.load(f)
+            for cache_key, data in entries:
+                self._cache_put(cache_key, TranscriptionResult.model_validate(data))
+            logger.info(f"Loaded {len(self._cache)} cached transcriptions")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Could not load transcription cache: {str(e)}")
+    
+    def save_cache(self, cache_file: Path):
+        """Persist cached transcriptions so they survive restarts."""
+        try:
+            entries = [
+                [cache_key, result.model_dump(mode="json")]
+                for cache_key, result in self._cache.items()
+            ]
+            with open(cache_file, 'w') as f:
+                json.dump(entries, f)
+        except Exception as e:
+            logger.warning(f"Could not save transcription cache: {str(e)}")
+    
     async def _mock_transcription(self, chunk: AudioChunk, audio_file_path: Path) -> str:
         """
         Mock transcription service for demonstration purposes.
@@ -188,23 +324,17 @@ class ElevenLabsTranscriptionService:
         Educational note: This shows how to create mock services
         for development and testing when external APIs aren't available.
         """
-        # Simulate API processing time
-        await asyncio.sleep(0.5 + (chunk.duration * 0.1))  # Simulate realistic processing time
-        
-        # Generate mock transcription based on chunk properties
-        mock_transcriptions = [
-            f"This is the transcription for audio chunk {chunk.chunk_index + 1}. ",
-            f"The audio segment from {chunk.start_time:.1f} to {chunk.end_time:.1f} seconds contains speech. ",
-            f"This chunk has a duration of {chunk.duration:.1f} seconds and represents part of the original audio. ",
-            "In a real application, this would be the actual transcribed text from the ElevenLabs API. ",
-            "The transcription quality would depend on audio clarity, language, and background noise. ",
-            "Users can edit this text to correct any transcription errors. ",
-            "This interactive editing feature is crucial for high-quality results. ",
-            "The application demonstrates proper error handling and user feedback loops. "
-        ]
+        # Simulate API processing time (MOCK_SLEEP_SCALE=0 skips it, e.g.
+        # when benchmarking the rest of the pipeline)
+        await asyncio.sleep(self.mock_sleep_scale * (0.5 + (chunk.duration * 0.1)))
         
         # Select mock text based on chunk index
-        selected_text = mock_transcriptions[chunk.chunk_index % len(mock_transcriptions)]
+        selected_text = MOCK_TRANSCRIPTIONS[chunk.chunk_index % len(MOCK_TRANSCRIPTIONS)].format(
+            number=chunk.chunk_index + 1,
+            start=chunk.start_time,
+            end=chunk.end_time,
+            duration=chunk.duration
+        )
         
         # Add some variation based on chunk properties
         if chunk.duration < 10:
@@ -232,22 +362,22 @@ class ElevenLabsTranscriptionService:
             headers = {"xi-api-key": self.api_key}
             url = f"{self.base_url}/user"
             
-            async with aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=10)) as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status == 200:
-                        user_data = await response.json()
-                        return {
-                            "status": "active",
-                            "available": True,
-                            "quota_remaining": user_data.get("character_count", "unknown"),
-                            "rate_limit": "standard"
-                        }
-                    else:
-                        return {
-                            "status": "error",
-                            "available": False,
-                            "error": f"API returned status {response.status}"
-                        }
+            session = self._get_session()
+            async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200:
+                    user_data = await response.json()
+                    return {
+                        "status": "active",
+                        "available": True,
+                        "quota_remaining": user_data.get("character_count", "unknown"),
+                        "rate_limit": "standard"
+                    }
+                else:
+                    return {
+                        "status": "error",
+                        "available": False,
+                        "error": f"API returned status {response.status}"
+                    }
         except Exception as e:
             return {
                 "status": "error",
@@ -308,18 +438,17 @@ async def demo_transcription_workflow():
     """
     Demonstrate the complete transcription workflow.
     """
-    service = ElevenLabsTranscriptionService()
-    
-    print("\nTranscription Service Demo")
-    print("=" * 30)
-    
-    # Check API status
-    status = await service.get_api_status()
-    print(f"API Status: {status}")
-    
-    # Show processing time estimation
-    estimated_time = service.estimate_processing_time(120)  # 2 minutes of audio
-    print(f"Estimated processing time for 2 minutes of audio: {estimated_time:.1f} seconds")
+    async with ElevenLabsTranscriptionService() as service:
+        print("\nTranscription Service Demo")
+        print("=" * 30)
+        
+        # Check API status
+        status = await service.get_api_status()
+        print(f"API Status: {status}")
+        
+        # Show processing time estimation
+        estimated_time = service.estimate_processing_time(120)  # 2 minutes of audio
+        print(f"Estimated processing time for 2 minutes of audio: {estimated_time:.1f} seconds")
 
 
 if __name__ == "__main__":
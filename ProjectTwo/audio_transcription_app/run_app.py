@@ -13,9 +13,21 @@ startup scripts for their applications.
 
 import sys
 import os
-import subprocess
+from importlib.util import find_spec
 from pathlib import Path
 
+# Directory of this script (symlinks resolved); the app runs from here
+APP_DIR = Path(__file__).resolve().parent
+
+# Packages the application needs to start
+REQUIRED_PACKAGES = ('fastapi', 'uvicorn', 'pydantic', 'librosa', 'pydub')
+
+# APP_SKIP_CHECKS=1 skips the environment checks (e.g. for CI or quick restarts)
+SKIP_CHECKS = os.environ.get("APP_SKIP_CHECKS") == "1"
+
+# --dev turns on auto-reload when code changes
+DEV_MODE = "--dev" in sys.argv[1:]
+
 def check_python_version():
     """Ensure we're using Python 3.7+"""
     if sys.version_info < (3, 7):
@@ -27,34 +39,27 @@ def check_python_version():
 
 def check_virtual_environment():
     """Check if we're in a virtual environment"""
-    if hasattr(sys, 'real_prefix') or (hasattr(sys, 'base_prefix') and sys.base_prefix != sys.prefix):
+    if sys.prefix != sys.base_prefix:
         print("✅ Virtual environment detected")
         return True
     else:
         print("⚠️  Virtual environment not detected")
         print("It's recommended to run this in a virtual environment")
+        # FORCE_NO_VENV=1 continues without asking, so scripts never wait on stdin
+        if os.environ.get("FORCE_NO_VENV") == "1":
+            print("Continuing without one (FORCE_NO_VENV=1)")
+            return True
         response = input("Continue anyway? (y/N): ").lower().strip()
         return response == 'y'
 
 def check_dependencies():
     """Check if required packages are installed"""
-    required_packages = [
-        'fastapi',
-        'uvicorn',
-        'pydantic',
-        'librosa',
-        'pydub'
-    ]
-    
-    missing_packages = []
+    # find_spec only locates each package; importing them here would load
+    # librosa, numba and the rest just to throw them away
+    missing_packages = tuple(package for package in REQUIRED_PACKAGES if find_spec(package) is None)
     
-    for package in required_packages:
-        try:
-            __import__(package)
-            print(f"✅ {package}")
-        except ImportError:
-            print(f"❌ {package}")
-            missing_packages.append(package)
+    for package in REQUIRED_PACKAGES:
+        print(f"❌ {package}" if package in missing_packages else f"✅ {package}")
     
     if missing_packages:
         print(f"\n⚠️  Missing packages: {', '.join(missing_packages)}")
@@ -65,11 +70,15 @@ def check_dependencies():
 
 def create_directories():
     """Create necessary directories"""
-    dirs = ['audio_files', 'audio_files/chunks', 'audio_files/temp']
+    # Create the root once, then its subdirectories directly inside it
+    # (next to this script, where the app runs, whatever the caller's cwd)
+    root = APP_DIR / 'audio_files'
+    root.mkdir(exist_ok=True)
+    print("✅ Directory: audio_files")
     
-    for dir_path in dirs:
-        Path(dir_path).mkdir(parents=True, exist_ok=True)
-        print(f"✅ Directory: {dir_path}")
+    for sub in ('chunks', 'temp'):
+        (root / sub).mkdir(exist_ok=True)
+        print(f"✅ Directory: audio_files/{sub}")
 
 def print_startup_info():
     """Print helpful information about the application"""
@@ -96,15 +105,18 @@ def main():
     print("-" * 50)
     
     # Check system requirements
-    if not check_python_version():
-        sys.exit(1)
-    
-    if not check_virtual_environment():
-        sys.exit(1)
-    
-    print("\n📦 Checking dependencies...")
-    if not check_dependencies():
-        sys.exit(1)
+    if SKIP_CHECKS:
+        print("⏭️  Skipping environment checks (APP_SKIP_CHECKS=1)")
+    else:
+        if not check_python_version():
+            sys.exit(1)
+        
+        if not check_virtual_environment():
+            sys.exit(1)
+        
+        print("\n📦 Checking dependencies...")
+        if not check_dependencies():
+            sys.exit(1)
     
     print("\n📁 Setting up directories...")
     create_directories()
@@ -115,17 +127,30 @@ def main():
     # Start the application
     try:
         # Change to app directory
-        os.chdir(Path(__file__).parent)
+        os.chdir(APP_DIR)
         
-        # Start uvicorn server
-        subprocess.run([
-            sys.executable, "-m", "uvicorn",
-            "app.main:app",
-            "--host", "0.0.0.0",
-            "--port", "8000",
-            "--reload",
-            "--log-level", "info"
-        ])
+        import uvicorn
+        if DEV_MODE:
+            # Auto-reload needs uvicorn's supervisor, which runs the server
+            # in a worker process it restarts on code changes
+            uvicorn.run(
+                "app.main:app",
+                host="0.0.0.0",
+                port=8000,
+                reload=True,
+                log_level="info"
+            )
+        else:
+            # Serve from this process: no reloader and no worker process.
+            # Server.run() sets up the event loop policy (uvloop when
+            # installed) before serving, as uvicorn.run does
+            config = uvicorn.Config(
+                "app.main:app",
+                host="0.0.0.0",
+                port=8000,
+                log_level="info"
+            )
+            uvicorn.Server(config).run()
         
     except KeyboardInterrupt:
         print("\n\n👋 Application stopped by user")
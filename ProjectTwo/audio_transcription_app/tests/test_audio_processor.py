@@ -12,39 +12,45 @@ This shows students how to write effective tests.
 """
 
 import pytest
-import tempfile
 import os
-from pathlib import Path
-from unittest.mock import Mock, patch
-import asyncio
+from unittest.mock import MagicMock, patch
 
 # Import the modules we're testing
 from app.services.audio_processor import AudioProcessor
-from app.models.audio_models import AudioFileModel, AudioChunk, ProcessingStatus
+from app.models.audio_models import AudioFileModel, AudioChunk, AudioChunkRecord, ProcessingStatus
 
 
 class TestAudioProcessor:
     """Test class for AudioProcessor service"""
     
-    @pytest.fixture
-    def audio_processor(self):
-        """Create an AudioProcessor instance for testing"""
+    @staticmethod
+    def _make_processor(base_dir):
+        """Create an AudioProcessor writing under base_dir"""
         return AudioProcessor(
             chunk_duration=30,
             min_silence_len=500,
             silence_thresh=-40,
-            output_dir="./test_audio_files"
+            output_dir=str(base_dir / "test_audio_files")
         )
     
+    @pytest.fixture(scope="class")
+    def audio_processor(self, tmp_path_factory):
+        """Create an AudioProcessor instance shared by the tests that only read it"""
+        return self._make_processor(tmp_path_factory.mktemp("ap"))
+    
+    @pytest.fixture
+    def audio_processor_fresh(self, tmp_path):
+        """Create a separate AudioProcessor for tests that change its files"""
+        return self._make_processor(tmp_path)
+    
     @pytest.fixture
-    def sample_audio_file(self):
-        """Create a temporary audio file for testing"""
-        # Create a temporary file
-        with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as temp_file:
-            # In a real test, you'd create actual audio data
-            # For demo purposes, we'll just create an empty file
-            temp_file.write(b"fake_audio_data")
-            return temp_file.name
+    def sample_audio_file(self, tmp_path):
+        """Create a sample audio file for testing"""
+        # Tests mock AudioSegment, so the content is never decoded; the
+        # file only has to exist (pytest removes tmp_path on its own)
+        file_path = tmp_path / "audio.wav"
+        file_path.write_bytes(b"fake_audio_data")
+        return str(file_path)
     
     def test_audio_processor_initialization(self, audio_processor):
         """Test that AudioProcessor initializes correctly"""
@@ -61,27 +67,28 @@ class TestAudioProcessor:
         assert (audio_processor.output_dir / "temp").exists()
     
     @pytest.mark.asyncio
-    async def test_analyze_audio_file_mock(self, audio_processor):
+    async def test_analyze_audio_file_mock(self, audio_processor, sample_audio_file):
         """Test audio file analysis with mocked dependencies"""
         # Mock the external dependencies
-        with patch('app.services.audio_processor.librosa') as mock_librosa, \
-             patch('app.services.audio_processor.AudioSegment') as mock_audio_segment:
+        with patch('app.services.audio_processor.AudioSegment') as mock_audio_segment:
             
-            # Configure mocks
-            mock_librosa.load.return_value = ([1, 2, 3], 22050)  # Mock audio data and sample rate
-            mock_librosa.duration.return_value = 60.0  # 60 seconds
-            
-            mock_audio = Mock()
+            # Configure mocks (60 seconds of audio at 22050 Hz)
+            mock_audio = MagicMock()
+            mock_audio.__len__.return_value = 60000  # milliseconds
+            mock_audio.frame_rate = 22050
             mock_audio.channels = 2
             mock_audio_segment.from_file.return_value = mock_audio
             mock_audio.export.return_value = None
             
             # Test the method
-            result = await audio_processor._analyze_audio_file("/fake/path.wav", "test.wav")
+            result, audio = await audio_processor._analyze_audio_file(sample_audio_file, "test.wav")
             
             # Assertions
+            assert audio is mock_audio
+            assert mock_audio_segment.from_file.call_count == 1
             assert isinstance(result, AudioFileModel)
             assert result.original_filename == "test.wav"
+            assert result.file_size == len(b"fake_audio_data")
             assert result.duration_seconds == 60.0
             assert result.sample_rate == 22050
             assert result.channels == 2
@@ -95,106 +102,268 @@ class TestAudioProcessor:
         result_path = audio_processor.get_chunk_file_path(chunk_filename)
         
         assert result_path == expected_path
+
+    def test_detect_silence_matches_pydub(self, audio_processor):
+        """Test that the vectorized silence scan finds the same ranges as pydub"""
+        import numpy as np
+        from pydub import AudioSegment
+        from pydub.silence import detect_silence
+
+        # 6 seconds of noise at 8kHz with quiet gaps of different lengths
+        rng = np.random.default_rng(0)
+        samples = rng.normal(0, 8000, 6 * 8000)
+        samples[8000:14000] *= 0.001
+        samples[24000:26000] *= 0.001
+        samples[36000:41000] = 0
+        audio = AudioSegment(
+            data=samples.astype(np.int16).tobytes(),
+            sample_width=2,
+            frame_rate=8000,
+            channels=1
+        )
+
+        expected = detect_silence(
+            audio,
+            min_silence_len=audio_processor.min_silence_len,
+            silence_thresh=audio_processor.silence_thresh
+        )
+
+        assert len(expected) == 2
+        assert audio_processor._detect_silence(audio) == expected
+
+    def test_combined_chunks_are_contiguous(self, audio_processor):
+        """Test that combined chunks follow each other and end with the audio"""
+        import numpy as np
+        from pydub import AudioSegment
+        
+        # 8 consecutive 12.1s segments covering the whole audio; at most two
+        # fit in 30s, so they combine into 4 chunks
+        rng = np.random.default_rng(0)
+        audio = AudioSegment(
+            data=rng.normal(0, 8000, 8 * 12100 * 8).astype(np.int16).tobytes(),
+            sample_width=2,
+            frame_rate=8000,
+            channels=1
+        )
+        segments = [audio[i * 12100:(i + 1) * 12100] for i in range(8)]
+        
+        chunks = [chunk for chunk, _ in audio_processor._combine_chunks_to_target_duration(segments, "file456")]
+        
+        assert len(chunks) == 4
+        assert chunks[0].start_time == 0.0
+        for previous, following in zip(chunks, chunks[1:]):
+            assert previous.end_time == following.start_time
+        assert chunks[-1].end_time == len(audio) / 1000
+    
+    @pytest.fixture
+    def fake_decoder(self):
+        """Stand in for ffmpeg: decode non-WAV uploads to 1s of noise derived from their bytes"""
+        import numpy as np
+        from pydub import AudioSegment
+        
+        real_from_file = AudioSegment.from_file
+        decoded = []
+        
+        def from_file(file, format=None, **kwargs):
+            # WAV (including from_wav on the cache) is still read for real
+            if format == "wav" or str(file).endswith(".wav"):
+                return real_from_file(file, format, **kwargs)
+            decoded.append(file)
+            with open(file, "rb") as f:
+                seed = int.from_bytes(f.read()[:8].ljust(8, b"\0"), "little")
+            samples = np.random.default_rng(seed).normal(0, 8000, 8000)
+            return AudioSegment(
+                data=samples.astype(np.int16).tobytes(),
+                sample_width=2,
+                frame_rate=8000,
+                channels=1
+            )
+        
+        with patch.object(AudioSegment, "from_file", side_effect=from_file):
+            yield decoded
+    
+    @pytest.mark.asyncio
+    async def test_decode_cache_miss_then_hit(self, tmp_path, fake_decoder):
+        """Test that an identical upload reuses the cached decode"""
+        processor = AudioProcessor(output_dir=str(tmp_path / "out"))
+        first = tmp_path / "first.mp3"
+        second = tmp_path / "second.mp3"
+        first.write_bytes(b"same upload")
+        second.write_bytes(b"same upload")
+        
+        audio, cached_path = await processor._load_audio(str(first))
+        assert len(fake_decoder) == 1
+        assert cached_path.parent == processor.output_dir / "cache"
+        assert cached_path.exists()
+        
+        cached_audio, hit_path = await processor._load_audio(str(second))
+        assert len(fake_decoder) == 1
+        assert hit_path == cached_path
+        assert cached_audio.raw_data == audio.raw_data
+    
+    @pytest.mark.asyncio
+    async def test_decode_cache_evicts_least_recently_used(self, tmp_path, fake_decoder):
+        """Test that the cache keeps only decode_cache_size entries"""
+        import time
+        
+        processor = AudioProcessor(output_dir=str(tmp_path / "out"), decode_cache_size=2)
+        cached_paths = []
+        for i in range(3):
+            upload = tmp_path / f"upload{i}.mp3"
+            upload.write_bytes(f"upload {i}".encode())
+            _, cached_path = await processor._load_audio(str(upload))
+            cached_paths.append(cached_path)
+            # Make the use order unambiguous whatever the mtime resolution
+            os.utime(cached_path, (time.time() - 100 + i, time.time() - 100 + i))
+        
+        assert not cached_paths[0].exists()
+        assert cached_paths[1].exists() and cached_paths[2].exists()
+        assert len(list((processor.output_dir / "cache").glob("*.wav"))) == 2
     
-    def test_cleanup_temp_files(self, audio_processor):
+    @pytest.mark.asyncio
+    async def test_decode_cache_replaces_corrupt_entry(self, tmp_path, fake_decoder):
+        """Test that an unreadable cache entry is decoded again and rewritten"""
+        processor = AudioProcessor(output_dir=str(tmp_path / "out"))
+        upload = tmp_path / "upload.mp3"
+        upload.write_bytes(b"some upload")
+        
+        digest = processor._file_digest(str(upload))
+        cached_path = processor.output_dir / "cache" / f"{digest}.wav"
+        cached_path.write_bytes(b"not a wav file")
+        
+        audio, returned_path = await processor._load_audio(str(upload))
+        
+        assert len(fake_decoder) == 1
+        assert returned_path == cached_path
+        assert cached_path.read_bytes()[:4] == b"RIFF"
+        assert len(audio) == 1000
+    
+    def test_store_processed_file_after_eviction(self, audio_processor_fresh, tmp_path):
+        """Test that an evicted cache entry falls back to exporting the decoded audio"""
+        from pydub import AudioSegment
+        
+        audio = AudioSegment.silent(duration=500, frame_rate=8000)
+        evicted_path = audio_processor_fresh.output_dir / "cache" / "evicted.wav"
+        processed_path = audio_processor_fresh.output_dir / "processed.wav"
+        
+        audio_processor_fresh._store_processed_file(evicted_path, audio, processed_path)
+        
+        assert AudioSegment.from_wav(processed_path).raw_data == audio.raw_data
+    
+    def test_cleanup_temp_files(self, audio_processor_fresh):
         """Test temporary file cleanup"""
         # Create some fake files
         test_file_id = "test123"
-        chunk_dir = audio_processor.output_dir / "chunks"
+        chunk_dir = audio_processor_fresh.output_dir / "chunks"
         chunk_dir.mkdir(exist_ok=True)
         
         # Create test files
         test_files = [
             chunk_dir / f"chunk_{test_file_id}_001_abc.wav",
             chunk_dir / f"chunk_{test_file_id}_002_def.wav",
-            audio_processor.output_dir / f"{test_file_id}_original.wav"
+            audio_processor_fresh.output_dir / f"{test_file_id}_original.wav"
         ]
         
         for file_path in test_files:
-            file_path.touch()  # Create empty file
-        
-        # Verify files exist
-        for file_path in test_files:
-            assert file_path.exists()
+            # Create empty file (a single open, no stat or utime as with touch)
+            os.close(os.open(file_path, os.O_CREAT | os.O_WRONLY, 0o644))
         
-        # Clean up
-        audio_processor.cleanup_temp_files(test_file_id)
+        # Clean up; every created file should be counted as removed
+        assert audio_processor_fresh.cleanup_temp_files(test_file_id) == len(test_files)
         
         # Verify files are removed
         for file_path in test_files:
             assert not file_path.exists()
     
     @pytest.mark.asyncio
-    async def test_demonstrate_chunking_strategies(self):
+    async def test_demonstrate_chunking_strategies(self, tmp_path, monkeypatch, capsys):
         """Test the educational demonstration function"""
         from app.services.audio_processor import demonstrate_chunking_strategies
         
-        # This should run without errors
+        # The demo uses the default ./audio_files directory
+        monkeypatch.chdir(tmp_path)
+        
         await demonstrate_chunking_strategies()
-        # In a real test, you might capture output and verify content
-    
-    def teardown_method(self):
-        """Clean up after each test"""
-        # Remove test directories if they exist
-        import shutil
-        test_dir = Path("./test_audio_files")
-        if test_dir.exists():
-            shutil.rmtree(test_dir)
+        
+        # The demo should describe each strategy and the available features
+        out = capsys.readouterr().out
+        assert "Audio Chunking Strategies Demo" in out
+        assert "Silence-based chunking" in out
+        assert "Time-based chunking" in out
+        assert "Available features:" in out
+
+
+# Field values used to build the models checked in TestAudioModels
+AUDIO_FILE_MODEL_DATA = {
+    "id": "test123",
+    "filename": "processed_test.wav",
+    "original_filename": "test.wav",
+    "file_size": 1024000,
+    "duration_seconds": 60.5,
+    "format": "wav",
+    "sample_rate": 44100,
+    "channels": 2
+}
+
+AUDIO_CHUNK_DATA = {
+    "id": "chunk123",
+    "file_id": "file456",
+    "chunk_index": 0,
+    "start_time": 0.0,
+    "end_time": 30.0,
+    "duration": 30.0,
+    "chunk_filename": "chunk_file456_000_chunk123.wav"
+}
+
+
+@pytest.fixture(scope="module")
+def audio_file_model():
+    """Build the AudioFileModel once for all field checks"""
+    return AudioFileModel(**AUDIO_FILE_MODEL_DATA)
+
+
+@pytest.fixture(scope="module")
+def audio_chunk():
+    """Build the AudioChunk once for all field checks"""
+    return AudioChunk(**AUDIO_CHUNK_DATA)
 
 
 class TestAudioModels:
     """Test the Pydantic models used for audio processing"""
     
-    def test_audio_file_model_creation(self):
-        """Test AudioFileModel creation and validation"""
+    @pytest.mark.parametrize("field,expected", list(AUDIO_FILE_MODEL_DATA.items()))
+    def test_audio_file_model_fields(self, audio_file_model, field, expected):
+        """Test that every AudioFileModel field is properly set"""
+        assert getattr(audio_file_model, field) == expected
+    
+    def test_audio_file_model_defaults(self, audio_file_model):
+        """Test the AudioFileModel fields filled in by default"""
         from datetime import datetime
         
-        model_data = {
-            "id": "test123",
-            "filename": "processed_test.wav",
-            "original_filename": "test.wav",
-            "file_size": 1024000,
-            "duration_seconds": 60.5,
-            "format": "wav",
-            "sample_rate": 44100,
-            "channels": 2
-        }
-        
-        audio_file = AudioFileModel(**model_data)
-        
-        # Test that all fields are properly set
-        assert audio_file.id == "test123"
-        assert audio_file.filename == "processed_test.wav"
-        assert audio_file.original_filename == "test.wav"
-        assert audio_file.file_size == 1024000
-        assert audio_file.duration_seconds == 60.5
-        assert audio_file.format == "wav"
-        assert audio_file.sample_rate == 44100
-        assert audio_file.channels == 2
-        assert audio_file.processing_status == ProcessingStatus.PENDING
-        assert isinstance(audio_file.upload_timestamp, datetime)
+        assert audio_file_model.processing_status == ProcessingStatus.PENDING
+        assert isinstance(audio_file_model.upload_timestamp, datetime)
     
-    def test_audio_chunk_model_creation(self):
-        """Test AudioChunk model creation and validation"""
-        chunk_data = {
-            "id": "chunk123",
-            "file_id": "file456",
-            "chunk_index": 0,
-            "start_time": 0.0,
-            "end_time": 30.0,
-            "duration": 30.0,
-            "chunk_filename": "chunk_file456_000_chunk123.wav"
-        }
-        
-        chunk = AudioChunk(**chunk_data)
-        
-        assert chunk.id == "chunk123"
-        assert chunk.file_id == "file456"
-        assert chunk.chunk_index == 0
-        assert chunk.start_time == 0.0
-        assert chunk.end_time == 30.0
-        assert chunk.duration == 30.0
-        assert chunk.chunk_filename == "chunk_file456_000_chunk123.wav"
+    @pytest.mark.parametrize("field,expected", list(AUDIO_CHUNK_DATA.items()))
+    def test_audio_chunk_model_fields(self, audio_chunk, field, expected):
+        """Test that every AudioChunk field is properly set"""
+        assert getattr(audio_chunk, field) == expected
+    
+    def test_audio_chunk_record_to_dict(self):
+        """Test that the slotted storage record keeps every field of the model"""
+        chunk = AudioChunk(
+            id="chunk123",
+            file_id="file456",
+            chunk_index=2,
+            start_time=60.0,
+            end_time=90.0,
+            duration=30.0,
+            chunk_filename="chunk_file456_002_chunk123.wav"
+        )
+        
+        record = AudioChunkRecord.from_model(chunk)
+        
+        assert not hasattr(record, "__dict__")
+        assert record.to_dict() == chunk.model_dump()
     
     def test_audio_file_model_validation(self):
         """Test that AudioFileModel validates inputs correctly"""
@@ -218,19 +387,20 @@ class TestAudioProcessingIntegration:
     
     @pytest.mark.asyncio
     @pytest.mark.slow  # Mark as slow test (can be skipped in quick test runs)
-    async def test_complete_processing_workflow_mock(self):
+    async def test_complete_processing_workflow_mock(self, tmp_path):
         """Test the complete workflow with mocked audio processing"""
-        processor = AudioProcessor(output_dir="./test_integration")
+        processor = AudioProcessor(output_dir=str(tmp_path / "test_integration"))
         
-        with patch('app.services.audio_processor.librosa') as mock_librosa, \
-             patch('app.services.audio_processor.AudioSegment') as mock_audio_segment:
-            
-            # Configure mocks for a 90-second audio file
-            mock_librosa.load.return_value = ([1] * 1980000, 22050)  # 90 seconds of fake data
-            mock_librosa.duration.return_value = 90.0
+        # The upload only has to exist; AudioSegment is mocked below
+        upload_path = tmp_path / "test_90_seconds.wav"
+        upload_path.write_bytes(b"fake_audio_data")
+        
+        with patch('app.services.audio_processor.AudioSegment') as mock_audio_segment:
             
-            # Mock AudioSegment
-            mock_audio = Mock()
+            # Mock AudioSegment for a 90-second audio file
+            mock_audio = MagicMock()
+            mock_audio.__len__.return_value = 90000  # milliseconds
+            mock_audio.frame_rate = 22050
             mock_audio.channels = 1
             mock_audio_segment.from_file.return_value = mock_audio
             mock_audio.export.return_value = None
@@ -254,7 +424,7 @@ class TestAudioProcessingIntegration:
                 
                 # Test processing
                 audio_info, chunks = await processor.process_audio_file(
-                    "/fake/path.wav", 
+                    str(upload_path), 
                     "test_90_seconds.wav"
                 )
                 
@@ -265,12 +435,6 @@ class TestAudioProcessingIntegration:
                 assert len(chunks) == 3
                 assert all(isinstance(chunk, AudioChunk) for chunk in chunks)
                 assert audio_info.processing_status == ProcessingStatus.COMPLETED
-        
-        # Cleanup
-        import shutil
-        test_dir = Path("./test_integration")
-        if test_dir.exists():
-            shutil.rmtree(test_dir)
 
 
 # Performance tests
@@ -278,23 +442,20 @@ class TestAudioProcessingPerformance:
     """Performance tests for audio processing"""
     
     @pytest.mark.performance
-    def test_chunking_algorithm_performance(self):
+    def test_chunking_algorithm_performance(self, tmp_path):
         """Test that chunking algorithms perform within acceptable limits"""
-        import time
-        
-        processor = AudioProcessor()
+        from time import perf_counter
         
-        # Simulate processing large file metadata
-        start_time = time.time()
+        processor = AudioProcessor(output_dir=str(tmp_path / "audio_files"))
+        chunk_filenames = [f"chunk_file_{i}_001_abc123.wav" for i in range(1000)]
         
         # Simulate processing 1000 metadata operations
-        for i in range(1000):
-            file_id = f"file_{i}"
-            chunk_filename = f"chunk_{file_id}_001_abc123.wav"
-            processor.get_chunk_file_path(chunk_filename)
+        start_time = perf_counter()
+        paths = [processor.get_chunk_file_path(chunk_filename) for chunk_filename in chunk_filenames]
+        processing_time = perf_counter() - start_time
         
-        end_time = time.time()
-        processing_time = end_time - start_time
+        chunks_dir = processor.output_dir / "chunks"
+        assert paths == [chunks_dir / chunk_filename for chunk_filename in chunk_filenames]
         
         # Should complete 1000 operations in less than 1 second
         assert processing_time < 1.0, f"Processing took {processing_time:.2f}s, expected < 1.0s"
@@ -0,0 +1,101 @@
+"""
+Test file for the API endpoints
+
+This demonstrates:
+- Testing FastAPI routes with TestClient
+- Overriding dependencies to isolate the code under test
+- Checking HTTP caching and Range behavior
+
+Educational note: Endpoint tests check what clients actually see:
+status codes, headers and bodies.
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import main
+from app.models.audio_models import AudioChunk, AudioChunkRecord
+from app.services.audio_processor import AudioProcessor
+
+
+# 1000 bytes with distinct values, so every range has a recognizable body
+CHUNK_BYTES = bytes(range(256)) * 3 + bytes(range(232))
+
+
+class TestChunkAudioRanges:
+    """Test Range and ETag handling when serving chunk audio"""
+
+    @pytest.fixture
+    def client(self, tmp_path, monkeypatch):
+        """Serve one chunk file from tmp_path"""
+        processor = AudioProcessor(output_dir=str(tmp_path / "audio_files"))
+        chunk = AudioChunk(
+            id="chunk123",
+            file_id="file456",
+            chunk_index=0,
+            start_time=0.0,
+            end_time=30.0,
+            duration=30.0,
+            chunk_filename="chunk_file456_000.wav",
+            etag="abc123"
+        )
+        processor.get_chunk_file_path(chunk.chunk_filename).write_bytes(CHUNK_BYTES)
+
+        monkeypatch.setitem(main.chunk_index, chunk.id, AudioChunkRecord.from_model(chunk))
+        monkeypatch.setitem(main.app.dependency_overrides, main.get_audio_processor, lambda: processor)
+        return TestClient(main.app)
+
+    def get_audio(self, client, **headers):
+        """Request the chunk audio with the given headers"""
+        return client.get("/api/chunks/chunk123/audio", headers=headers)
+
+    @pytest.mark.parametrize("range_header,start,end", [
+        ("bytes=100-199", 100, 199),
+        ("bytes=900-", 900, 999),
+        ("bytes=-50", 950, 999),
+        ("bytes=990-5000", 990, 999),
+    ])
+    def test_single_range(self, client, range_header, start, end):
+        """Test that a satisfiable range returns 206 with just those bytes"""
+        response = self.get_audio(client, Range=range_header)
+
+        assert response.status_code == 206
+        assert response.headers["content-range"] == f"bytes {start}-{end}/{len(CHUNK_BYTES)}"
+        assert response.headers["content-length"] == str(end - start + 1)
+        assert response.content == CHUNK_BYTES[start:end + 1]
+
+    @pytest.mark.parametrize("range_header", ["bytes=200-100", "bytes=1000-", "bytes=5000-6000"])
+    def test_unsatisfiable_range(self, client, range_header):
+        """Test that a range outside the file returns 416"""
+        response = self.get_audio(client, Range=range_header)
+
+        assert response.status_code == 416
+        assert response.headers["content-range"] == f"bytes */{len(CHUNK_BYTES)}"
+
+    @pytest.mark.parametrize("range_header", ["bytes=abc-def", "items=0-10", "bytes=0-10,20-30"])
+    def test_ignored_range(self, client, range_header):
+        """Test that malformed and multi-range headers get the whole file"""
+        response = self.get_audio(client, Range=range_header)
+
+        assert response.status_code == 200
+        assert response.content == CHUNK_BYTES
+
+    def test_no_range(self, client):
+        """Test that a plain request gets the whole file with its ETag"""
+        response = self.get_audio(client)
+
+        assert response.status_code == 200
+        assert response.headers["etag"] == '"abc123"'
+        assert response.headers["accept-ranges"] == "bytes"
+        assert response.content == CHUNK_BYTES
+
+    def test_if_none_match(self, client):
+        """Test that a matching If-None-Match returns 304 without a body"""
+        response = self.get_audio(client, **{"If-None-Match": '"abc123"'})
+
+        assert response.status_code == 304
+        assert response.content == b""
+
+    def test_unknown_chunk(self, client):
+        """Test that an unknown chunk id returns 404"""
+        assert client.get("/api/chunks/missing/audio").status_code == 404
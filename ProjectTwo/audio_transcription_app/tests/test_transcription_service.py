@@ -0,0 +1,103 @@
+"""
+Test file for the Transcription Service
+
+This demonstrates:
+- Testing a cache keyed by file content
+- Persisting and restoring state across restarts
+- Running the mock service without its simulated latency
+
+Educational note: Caches are easy to get subtly wrong, so their hits,
+evictions and persistence deserve tests of their own.
+"""
+
+import pytest
+from unittest.mock import patch
+
+from app.models.audio_models import AudioChunk
+from app.services.transcription_service import ElevenLabsTranscriptionService
+
+
+def make_chunk(chunk_id, chunk_index=0):
+    """Build a 30 second chunk with the given id and index"""
+    return AudioChunk(
+        id=chunk_id,
+        file_id="file456",
+        chunk_index=chunk_index,
+        start_time=chunk_index * 30.0,
+        end_time=(chunk_index + 1) * 30.0,
+        duration=30.0,
+        chunk_filename=f"chunk_file456_{chunk_index:03d}.wav"
+    )
+
+
+class TestTranscriptionCache:
+    """Test the content-hash LRU cache of transcriptions"""
+
+    @pytest.fixture
+    def service(self, monkeypatch):
+        """Mock service without simulated latency and room for two entries"""
+        monkeypatch.delenv("ELEVENLABS_API_KEY", raising=False)
+        monkeypatch.setenv("MOCK_SLEEP_SCALE", "0")
+        monkeypatch.setenv("TRANSCRIPTION_CACHE_SIZE", "2")
+        return ElevenLabsTranscriptionService()
+
+    @pytest.fixture
+    def audio_files(self, tmp_path):
+        """Three chunk files with different content"""
+        paths = []
+        for i in range(3):
+            path = tmp_path / f"chunk{i}.wav"
+            path.write_bytes(f"chunk audio {i}".encode())
+            paths.append(path)
+        return paths
+
+    @pytest.mark.asyncio
+    async def test_hit_returns_cached_text_for_new_chunk(self, service, tmp_path):
+        """Test that identical audio reuses the transcription under the new chunk id"""
+        first_path = tmp_path / "first.wav"
+        second_path = tmp_path / "second.wav"
+        first_path.write_bytes(b"same audio")
+        second_path.write_bytes(b"same audio")
+
+        first = await service.transcribe_chunk(make_chunk("chunk-a", 0), first_path)
+        with patch.object(service, "_mock_transcription") as mock_transcription:
+            second = await service.transcribe_chunk(make_chunk("chunk-b", 3), second_path)
+
+        mock_transcription.assert_not_called()
+        assert second.chunk_id == "chunk-b"
+        assert second.raw_transcription == first.raw_transcription
+        assert second.api_response_metadata["cache_hit"] is True
+        assert second.api_response_metadata["chunk_index"] == 3
+
+    @pytest.mark.asyncio
+    async def test_evicts_least_recently_used(self, service, audio_files):
+        """Test that the cache keeps only cache_size entries"""
+        for i, path in enumerate(audio_files):
+            await service.transcribe_chunk(make_chunk(f"chunk-{i}", i), path)
+
+        assert len(service._cache) == 2
+        assert service._cache_key(audio_files[0]) not in service._cache
+        assert service._cache_key(audio_files[2]) in service._cache
+
+    @pytest.mark.asyncio
+    async def test_save_and_load_round_trip(self, service, audio_files, tmp_path):
+        """Test that saved transcriptions are restored by a new service"""
+        cache_file = tmp_path / "transcription_cache.json"
+        for i, path in enumerate(audio_files[:2]):
+            await service.transcribe_chunk(make_chunk(f"chunk-{i}", i), path)
+
+        service.save_cache(cache_file)
+        restored = ElevenLabsTranscriptionService()
+        restored.load_cache(cache_file)
+
+        assert list(restored._cache) == list(service._cache)
+        assert list(restored._cache.values()) == list(service._cache.values())
+
+    def test_corrupt_cache_file_is_ignored(self, service, tmp_path):
+        """Test that an unreadable cache file leaves the cache empty"""
+        cache_file = tmp_path / "transcription_cache.json"
+        cache_file.write_text("not json")
+
+        service.load_cache(cache_file)
+
+        assert len(service._cache) == 0